@@ -1,13 +1,37 @@
-from .logger import add_id_to_log, install, log, Logger, LoggerWithExtraData, NullLogger
-from .utils import format_hexdump, log_hexdump
+from .logger import (
+    add_id_to_log,
+    create_formatter,
+    create_handler,
+    FormatterConfig,
+    get_log_context,
+    get_style_config,
+    install,
+    log,
+    log_context,
+    Logger,
+    LoggerWithExtraData,
+    NullLogger,
+)
+from .profiling import LogProfiler
+from .sinks import Route
+from .utils import format_hexdump, log_hexdump, TrafficLogger
 
 __all__ = (
     "add_id_to_log",
+    "create_formatter",
+    "create_handler",
     "format_hexdump",
+    "FormatterConfig",
+    "get_log_context",
+    "get_style_config",
     "install",
     "log",
+    "log_context",
     "log_hexdump",
     "Logger",
     "LoggerWithExtraData",
+    "LogProfiler",
     "NullLogger",
+    "Route",
+    "TrafficLogger",
 )
@@ -0,0 +1,118 @@
+"""Context-local data that is attached to every log record created within
+the context.
+"""
+
+import logging
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sys import intern
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping
+
+__all__ = ("get_log_context", "log_context")
+
+
+_EMPTY: Dict[str, Any] = {}
+
+_current: ContextVar[Dict[str, Any]] = ContextVar(
+    "flockwave_logger_context", default=_EMPTY
+)
+"""Context variable holding the attributes to add to the log records created
+in the current context. The dictionaries stored in the variable are never
+modified; a new dictionary is created for each nested context.
+"""
+
+_RESERVED_KEYS = frozenset(
+    logging.LogRecord("", logging.NOTSET, "", 0, "", None, None).__dict__
+) | frozenset(("asctime", "message"))
+"""Attributes of log records that cannot be overridden by the context."""
+
+
+def get_log_context() -> Mapping[str, Any]:
+    """Returns a read-only view of the attributes that are added to the log
+    records created in the current context.
+    """
+    return MappingProxyType(_current.get())
+
+
+def capture_log_context(record: logging.LogRecord) -> None:
+    """Stores a reference to the current context in the given log record so
+    the attributes of the context can be added to the record later, even
+    from a different thread or task.
+
+    Called by the log record factory when the record is created.
+    """
+    record._log_context = _current.get()  # type: ignore
+
+
+def get_log_context_id_of(record: logging.LogRecord) -> str:
+    """Returns the ID from the context that was captured in the given log
+    record when it was created, or an empty string if there is no such ID.
+    """
+    return record.__dict__.get("_log_context", _EMPTY).get("id", "")
+
+
+def inject_log_context(record: logging.LogRecord) -> bool:
+    """Adds the attributes of the context of the given log record to the
+    record, except the ones that the record has already.
+
+    The context is the one that was captured when the record was created. For
+    records that were created by a custom log record factory, the current
+    context is used instead, so this function must be called from the same
+    thread or task that logged the record.
+
+    This function can be used as a filter of logging handlers; it lets all
+    records through. `install()` adds it to the handler that it installs.
+    """
+    attrs = record.__dict__
+    context = attrs.get("_log_context")
+    if context is None:
+        context = _current.get()
+    if context:
+        for key, value in context.items():
+            if key not in attrs:
+                attrs[key] = value
+    return True
+
+
+@contextmanager
+def log_context(**kwds: Any) -> Iterator[None]:
+    """Context manager that adds the given attributes to all log records that
+    are created within the context, on top of the attributes of the
+    enclosing contexts.
+
+    The log record factory installed by `install()` captures the context
+    when a record is created, and the attributes are added to the record by
+    the handler installed by `install()` or by `AsyncLogSink` when the record
+    is enqueued, so sinks that format records later see the same attributes.
+
+    The context is stored in a context variable, so asyncio and Trio tasks
+    inherit the context that was active when they were spawned, and changes
+    made within a task are not visible to other tasks. New threads start
+    with an empty context.
+
+    Attributes passed explicitly in the ``extra`` dict of a logging call take
+    precedence over the ones from the context.
+
+    Parameters:
+        kwds: the attributes to add to the log records, e.g. ``id``
+
+    Raises:
+        KeyError: if one of the attributes would overwrite a standard
+            attribute of log records
+    """
+    reserved = _RESERVED_KEYS.intersection(kwds)
+    if reserved:
+        raise KeyError(f"Attempt to overwrite {sorted(reserved)[0]!r} in LogRecord")
+
+    id = kwds.get("id")
+    if isinstance(id, str):
+        # Interned for the same reason as in `add_id_to_log()`
+        kwds["id"] = intern(id)
+
+    token = _current.set({**_current.get(), **kwds})
+    try:
+        yield
+    finally:
+        _current.reset(token)
@@ -1,13 +1,24 @@
 import logging
 import platform
+import time
 
 from colorlog import default_log_colors
 from colorlog.formatter import ColoredRecord
 from colorlog.escape_codes import escape_codes, parse_colors
 from functools import lru_cache, partial
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
 
-__all__ = ("styles",)
+from .context import get_log_context_id_of
+from .records import get_template_id
+from .tracebacks import format_exception
+
+__all__ = (
+    "FormatterConfig",
+    "get_style_config",
+    "prepare_record",
+    "styles",
+    "terminal_styles",
+)
 
 
 default_log_symbols = {
@@ -19,11 +30,47 @@ default_log_symbols = {
 }
 
 
+_parse_colors = lru_cache(maxsize=256)(parse_colors)
+"""Cached variant of ``parse_colors()`` from ``colorlog``."""
+
+
 @lru_cache(maxsize=256)
 def _get_short_name_for_logger(name: str) -> str:
     return name.rpartition(".")[2]
 
 
+def _format_time(
+    formatter: logging.Formatter, record: Any, datefmt: Optional[str] = None
+) -> str:
+    """Implementation of ``formatTime()`` for our formatters that reuses the
+    broken-down local time stored in the record by `prepare_record()`.
+    """
+    ct = record.__dict__.get("_localtime")
+    if ct is None or formatter.converter is not time.localtime:
+        ct = formatter.converter(record.created)
+    if datefmt:
+        return time.strftime(datefmt, ct)
+    else:
+        s = time.strftime(formatter.default_time_format, ct)
+        if formatter.default_msec_format:
+            s = formatter.default_msec_format % (s, record.msecs)
+        return s
+
+
+def prepare_record(record: Any) -> None:
+    """Computes the parts of a log record that are shared by all the formatters
+    in this module and stores them in the record.
+
+    This is used when the same record is formatted by multiple formatters so
+    the shared parts are calculated only once.
+    """
+    record.message = record.getMessage()
+    if record.exc_info and not record.exc_text:
+        record.exc_text = format_exception(record.exc_info)
+    record.short_name = _get_short_name_for_logger(record.name)
+    record._localtime = time.localtime(record.created)
+
+
 class ColoredFormatter(logging.Formatter):
     """Logging formatter that adds colors to the log output.
 
@@ -65,12 +112,12 @@ class ColoredFormatter(logging.Formatter):
 
         assert log_colors is not None
 
-        self.log_colors = {k: parse_colors(v) for k, v in log_colors.items()}
+        self.log_colors = {k: _parse_colors(v) for k, v in log_colors.items()}
         self.log_symbols = (
             log_symbols if log_symbols is not None else default_log_symbols
         )
         self.log_symbol_colors = {
-            k: parse_colors(v) for k, v in (log_symbol_colors or {}).items()
+            k: _parse_colors(v) for k, v in (log_symbol_colors or {}).items()
         }
 
         self._line_continuation: Optional[str] = (
@@ -79,11 +126,38 @@ class ColoredFormatter(logging.Formatter):
             else None
         )
         self._last_formatted_time: Optional[str] = None
+        self._last_padded_text: Optional[Tuple[str, str]] = None
+
+    formatTime = _format_time
+
+    def format(self, record: Any) -> str:
+        """Format a log record object, padding the formatted exception and
+        stack information the same way as multi-line messages.
+        """
+        record.message = record.getMessage()
+        if self.usesTime():
+            record.asctime = self.formatTime(record, self.datefmt)
+        s = self.formatMessage(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            s += self._pad(record.exc_text)
+        if record.stack_info:
+            s += self._pad(self.formatStack(record.stack_info))
+        return s
+
+    def formatException(self, ei: Any) -> str:
+        """Format an exception, reusing earlier formatted representations of
+        the same exception.
+        """
+        return format_exception(ei)
 
     def formatMessage(self, record: Any) -> str:
         """Format a message from a log record object."""
         if not hasattr(record, "id"):
-            record.id = ""
+            # The record did not pass through the filter that adds the
+            # attributes of its log context
+            record.id = get_log_context_id_of(record)
 
         formatted_time = self.formatTime(record, "[%H:%M:%S]")
 
@@ -112,6 +186,27 @@ class ColoredFormatter(logging.Formatter):
 
         return message
 
+    def _pad(self, text: str) -> str:
+        """Pads a multi-line text that is to be appended to a formatted message
+        so each line is aligned with the message body.
+        """
+        continuation = self._line_continuation
+        if not continuation:
+            return "\n" + text
+
+        # The same exception is typically logged multiple times in a row so
+        # it's worth keeping the last padded text
+        last = self._last_padded_text
+        if last is not None and last[0] is text:
+            return last[1]
+
+        padding = continuation[1:]
+        padded = "".join(
+            "\n" + padding + line if line else "\n" for line in text.split("\n")
+        )
+        self._last_padded_text = text, padded
+        return padded
+
     def get_preferred_color(self, record: Any, source: Dict[str, str]) -> str:
         """Return the preferred color for the given log record from the given
         color source.
@@ -150,20 +245,106 @@ class PlainFormatter(logging.Formatter):
 
         super().__init__(fmt, datefmt, style="{")
 
+    formatTime = _format_time
+
+    def formatException(self, ei: Any) -> str:
+        """Format an exception, reusing earlier formatted representations of
+        the same exception.
+        """
+        return format_exception(ei)
+
     def format(self, record: Any) -> str:
         """Format a message from a log record object."""
         if not hasattr(record, "id"):
-            record.id = ""
+            record.id = get_log_context_id_of(record)
 
         record.short_name = _get_short_name_for_logger(record.name)
 
         return super().format(record)
 
 
-def create_fancy_formatter(
+class FormatterConfig(NamedTuple):
+    """Precomputed, immutable configuration of a formatter.
+
+    Configurations consist of plain strings, numbers and tuples only so they
+    can be pickled or converted to JSON with `to_dict()`, e.g. to pass them
+    to worker processes that need to format log records the same way.
+    """
+
+    kind: str
+    """Kind of the formatter; one of ``colored``, ``plain`` or ``json``."""
+
+    fmt: str
+    """The format string of the formatter."""
+
+    datefmt: Optional[str] = None
+    """The format string to use for dates."""
+
+    log_colors: Tuple[Tuple[str, str], ...] = ()
+    """Pairs of log level names or semantics and the colors to use for the
+    body text of the log message; used by ``colored`` formatters only.
+    """
+
+    log_symbol_colors: Tuple[Tuple[str, str], ...] = ()
+    """Pairs of log level names or semantics and the colors to use for the
+    symbol of the log message; used by ``colored`` formatters only.
+    """
+
+    log_symbols: Tuple[Tuple[str, str], ...] = ()
+    """Pairs of log level names or semantics and the symbols to show in front
+    of the log message; used by ``colored`` formatters only.
+    """
+
+    line_continuation_padding: int = 0
+    """Number of spaces to put in front of all but the first line in
+    multi-line log messages; used by ``colored`` formatters only.
+    """
+
+    show_template: bool = False
+    """Whether to emit the message template of each record; used by ``json``
+    formatters only.
+    """
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FormatterConfig":
+        """Restores a configuration from its representation returned by
+        `to_dict()`.
+        """
+        data = dict(data)
+        for key in ("log_colors", "log_symbol_colors", "log_symbols"):
+            if key in data:
+                data[key] = tuple(tuple(item) for item in data[key])
+        return cls(**data)
+
+    def create_formatter(self) -> logging.Formatter:
+        """Creates a new formatter from this configuration."""
+        if self.kind == "colored":
+            return ColoredFormatter(
+                self.fmt,
+                self.datefmt,
+                log_colors=dict(self.log_colors),
+                log_symbol_colors=dict(self.log_symbol_colors),
+                log_symbols=dict(self.log_symbols),
+                line_continuation_padding=self.line_continuation_padding,
+            )
+        elif self.kind == "plain":
+            return PlainFormatter(self.fmt, self.datefmt)
+        elif self.kind == "json":
+            factory = _get_json_formatter_class()
+            return factory(self.fmt, self.datefmt, show_template=self.show_template)
+        else:
+            raise ValueError(f"unknown formatter kind: {self.kind!r}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns a representation of this configuration that can be
+        converted to JSON.
+        """
+        return self._asdict()
+
+
+def _get_fancy_style_config(
     show_name: bool = True, show_id: bool = True, show_timestamp: bool = True
-) -> logging.Formatter:
-    """Creates a colorful log formatter suitable for terminal output."""
+) -> FormatterConfig:
     log_colors = dict(default_log_colors)
     log_colors.update(
         DEBUG="purple",
@@ -223,50 +404,175 @@ def create_fancy_formatter(
 
     format_string.append("{log_color}{message}{reset}")
 
-    format_string = "".join(format_string)
-
-    return ColoredFormatter(
-        format_string,
-        log_colors=log_colors,
-        log_symbol_colors=log_symbol_colors,
-        log_symbols=log_symbols,
+    return FormatterConfig(
+        "colored",
+        "".join(format_string),
+        log_colors=tuple(log_colors.items()),
+        log_symbol_colors=tuple(log_symbol_colors.items()),
+        log_symbols=tuple(log_symbols.items()),
         line_continuation_padding=line_continuation_padding,
     )
 
 
+def _get_plain_style_config() -> FormatterConfig:
+    return FormatterConfig("plain", "{short_name}:{id}: {message}")
+
+
+def _get_json_style_config(show_template: bool = False) -> FormatterConfig:
+    return FormatterConfig(
+        "json", "%(levelname)s %(name)s %(message)s", show_template=show_template
+    )
+
+
+def _get_tabular_style_config(show_timestamp: bool = True) -> FormatterConfig:
+    parts = ["{levelname}", "{name}", "{id}", "{message}"]
+    if show_timestamp:
+        parts.insert(0, "{asctime}.{msecs:03.0f}")
+    return FormatterConfig("plain", "\t".join(parts), datefmt="%Y-%m-%d %H:%M:%S")
+
+
+_style_configs: Dict[str, Callable[..., FormatterConfig]] = {
+    "fancy": _get_fancy_style_config,
+    "colorful": partial(_get_fancy_style_config, show_id=False),
+    "plain": _get_plain_style_config,
+    "symbolic": partial(_get_fancy_style_config, show_id=False, show_name=False),
+    "tabular": _get_tabular_style_config,
+    "json": _get_json_style_config,
+}
+"""Functions that return the formatter configuration of each style, given the
+options of the style as keyword arguments.
+"""
+
+
+@lru_cache(maxsize=64)
+def get_style_config(style: str, **options: Any) -> FormatterConfig:
+    """Returns the formatter configuration of the given style with the given
+    options.
+
+    Configurations are computed and validated once for each style and set of
+    options; subsequent calls return the same configuration object.
+
+    Parameters:
+        style: the name of the style
+        options: style-specific options, e.g. ``show_timestamp=False``
+
+    Raises:
+        ValueError: if there is no such style
+    """
+    func = _style_configs.get(style)
+    if func is None:
+        raise ValueError(f"unknown style: {style!r}")
+
+    config = func(**options)
+
+    # Creating a formatter parses the colors and the format string, which
+    # raises an error if the configuration is invalid
+    config.create_formatter()
+
+    return config
+
+
+def create_fancy_formatter(
+    show_name: bool = True, show_id: bool = True, show_timestamp: bool = True
+) -> logging.Formatter:
+    """Creates a colorful log formatter suitable for terminal output."""
+    return get_style_config(
+        "fancy", show_name=show_name, show_id=show_id, show_timestamp=show_timestamp
+    ).create_formatter()
+
+
 def create_plain_formatter() -> logging.Formatter:
     """Creates a log formatter suitable for system journals. It is assumed
     that the system journal adds the timestamp in front of the message.
     """
-    return PlainFormatter("{short_name}:{id}: {message}")
+    return get_style_config("plain").create_formatter()
+
+
+@lru_cache(maxsize=1)
+def _get_json_formatter_class() -> type:
+    from pythonjsonlogger.json import JsonFormatter
 
+    class FlockwaveJsonFormatter(JsonFormatter):
+        """JSON formatter that optionally emits the ID of the message template
+        of each record, and the template itself and its raw arguments for
+        records that have arguments.
 
-def create_json_formatter() -> logging.Formatter:
+        Attributes that are added to the records by the other formatters in
+        this module are not emitted.
+        """
+
+        def __init__(self, *args, show_template: bool = False, **kwds):
+            super().__init__(*args, **kwds)
+            self._show_template = show_template
+            self._skip_fields.add("short_name")
+
+        def format(self, record: logging.LogRecord) -> str:
+            exc_info = record.exc_info
+            if not exc_info or not record.exc_text:
+                return super().format(record)
+
+            # The exception was formatted already; hide exc_info temporarily so
+            # the base class uses exc_text instead of formatting it again
+            record.exc_info = None
+            try:
+                return super().format(record)
+            finally:
+                record.exc_info = exc_info
+
+        def formatException(self, ei: Any) -> Any:
+            if self.exc_info_as_array:
+                return super().formatException(ei)
+            return format_exception(ei)
+
+        def add_fields(
+            self,
+            log_data: Dict[str, Any],
+            record: logging.LogRecord,
+            message_dict: Dict[str, Any],
+        ) -> None:
+            super().add_fields(log_data, record, message_dict)
+            if log_data.get("id") == "":
+                del log_data["id"]
+            if self._show_template:
+                log_data["template_id"] = get_template_id(record)
+                if record.args:
+                    log_data["template"] = record.msg
+                    log_data["args"] = record.args
+
+    return FlockwaveJsonFormatter
+
+
+def create_json_formatter(show_template: bool = False) -> logging.Formatter:
     """Creates a JSON formatter suitable for archival and communication with
     external processes that can parse JSON.
 
     Each log message occupies one line.
-    """
-    from pythonjsonlogger.json import JsonFormatter
 
-    return JsonFormatter("%(levelname)s %(name)s %(message)s")
+    Parameters:
+        show_template: whether to add the ID of the message template to each
+            record, and the template and its raw arguments to records with
+            arguments
+    """
+    return get_style_config("json", show_template=show_template).create_formatter()
 
 
 def create_tabular_formatter(show_timestamp: bool = True) -> logging.Formatter:
     """Creates a log formatter that separates the basic fields with tab
     characters.
     """
-    parts = ["{levelname}", "{name}", "{id}", "{message}"]
-    if show_timestamp:
-        parts.insert(0, "{asctime}.{msecs:03.0f}")
-    return PlainFormatter(fmt="\t".join(parts), datefmt="%Y-%m-%d %H:%M:%S")
+    return get_style_config("tabular", show_timestamp=show_timestamp).create_formatter()
+
 
+def _create_formatter_for_style(style: str, **options: Any) -> logging.Formatter:
+    return get_style_config(style, **options).create_formatter()
 
-styles: Dict[str, Callable[[], logging.Formatter]] = {
-    "fancy": create_fancy_formatter,
-    "colorful": partial(create_fancy_formatter, show_id=False),
-    "plain": create_plain_formatter,
-    "symbolic": partial(create_fancy_formatter, show_id=False, show_name=False),
-    "tabular": create_tabular_formatter,
-    "json": create_json_formatter,
+
+styles: Dict[str, Callable[..., logging.Formatter]] = {
+    name: partial(_create_formatter_for_style, name) for name in _style_configs
 }
+"""Functions that create a new formatter for each style, accepting the same
+options as `get_style_config()`.
+"""
+
+terminal_styles = frozenset(("fancy", "colorful", "symbolic"))
+"""Names of styles that are meant for terminals only."""
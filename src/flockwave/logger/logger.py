@@ -1,17 +1,43 @@
 """Logger object for the Flockwave server."""
 
 import logging
+import sys
 
 from functools import partial
-from typing import Any, Dict
+from itertools import chain
+from os import environ, fspath, PathLike
+from sys import intern
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple, Union
 
-from .formatters import styles
+from .context import get_log_context, inject_log_context, log_context
+from .formatters import FormatterConfig, get_style_config, styles, terminal_styles
 from .integrations import install_integrations
+from .profiling import LogProfiler
+from .records import (
+    disable_unused_record_fields,
+    install_record_factory,
+    restore_record_fields,
+)
+from .sinks import (
+    CompressedFileHandler,
+    FanOutHandler,
+    is_terminal,
+    Route,
+    RoutingHandler,
+    TerminalHandler,
+)
+from .tracebacks import traceback_cache
 from .utils import nop
 
 __all__ = (
     "add_id_to_log",
+    "create_formatter",
+    "create_handler",
+    "FormatterConfig",
+    "get_log_context",
+    "get_style_config",
     "log",
+    "log_context",
     "install",
     "Logger",
     "LoggerWithExtraData",
@@ -21,8 +47,25 @@ __all__ = (
 
 Logger = logging.Logger
 
+Sink = Union[None, str, "PathLike[str]", IO[str], logging.Handler]
+"""Type specification for objects that log records can be sent to."""
+
 log = logging.getLogger(__name__.rpartition(".")[0])
 
+#: Logging methods of loggers, mapped to the level that they log on. ``None``
+#: means that the level is given in the first positional argument.
+_LOGGING_METHODS: Dict[str, Optional[int]] = {
+    "critical": logging.CRITICAL,
+    "debug": logging.DEBUG,
+    "error": logging.ERROR,
+    "exception": logging.ERROR,
+    "fatal": logging.FATAL,
+    "info": logging.INFO,
+    "log": None,
+    "warn": logging.WARNING,
+    "warning": logging.WARNING,
+}
+
 
 class LoggerWithExtraData:
     """Object that provides the same interface as Python's standard logging
@@ -45,19 +88,40 @@ class LoggerWithExtraData:
         method = self._methods.get(name)
         if method is None:
             wrapped_method = getattr(self._log, name)
-            method = self._methods[name] = partial(self._call, wrapped_method)
+            if name not in _LOGGING_METHODS:
+                # Methods like isEnabledFor() do not accept an extra dict
+                return wrapped_method
+            method = self._methods[name] = partial(
+                self._call, wrapped_method, _LOGGING_METHODS[name]
+            )
         return method
 
-    def _call(self, func, *args, **kwds):
+    def _call(self, func, method_level: Optional[int], /, *args, **kwds):
+        # The bound arguments are positional-only so they do not clash with
+        # the keyword arguments of the caller, e.g. log(level=..., msg=...)
+        level = method_level
+        if level is None:
+            level = args[0] if args else kwds.get("level")
+
+        # Bail out early for records that would be filtered anyway so we do
+        # not need to merge the extra dicts. Invalid levels are left to the
+        # wrapped method to report.
+        if isinstance(level, int) and not self._log.isEnabledFor(level):
+            return
+
         extra = kwds.get("extra") or self._extra
 
         if extra is not self._extra:
-            for k, v in self._extra.items():
-                if k not in extra:
-                    extra[k] = v
+            # The extra dict passed by the caller may be shared (see
+            # `log_hexdump()`) so we must not modify it in place
+            if any(k not in extra for k in self._extra):
+                kwds["extra"] = {**self._extra, **extra}
         else:
             kwds["extra"] = self._extra
 
+        # Skip this frame when looking up the caller of the logging method
+        kwds["stacklevel"] = kwds.get("stacklevel", 1) + 1
+
         return func(*args, **kwds)
 
 
@@ -83,23 +147,164 @@ def add_id_to_log(log: Logger, id: str):
     Returns:
         a new logger that extends the extra dict of each logging record with
         the given ID
+
+    See `log_context()` for an alternative that does not require passing the
+    wrapped logger around.
     """
-    return LoggerWithExtraData(log, {"id": id})
+    # Interning the ID ensures that all log records with the same ID share
+    # the same string, no matter how many wrappers were created for it
+    return LoggerWithExtraData(log, {"id": intern(id) if isinstance(id, str) else id})
 
 
-def create_formatter(style: str = "fancy") -> logging.Formatter:
+def create_formatter(style: Union[str, FormatterConfig] = "fancy") -> logging.Formatter:
     """Creates a default log formatter according to the given style constant.
 
     Parameters:
         style: the style of the formatter; ``fancy`` shows a colorful output
             suitable for terminals, while ``plain`` shows a plain output that
-            is suitable for logging in system logs
+            is suitable for logging in system logs. May also be a formatter
+            configuration returned by `get_style_config()`, e.g. one that
+            was sent to a worker process by its parent.
     """
+    if isinstance(style, FormatterConfig):
+        return style.create_formatter()
     factory = styles.get(style, logging.Formatter)
     return factory()
 
 
-def install(level: int = logging.INFO, style: str = "fancy") -> None:
+def _is_colored_style(style: Union[str, FormatterConfig]) -> bool:
+    """Returns whether the given style emits color codes meant for
+    terminals.
+    """
+    if isinstance(style, FormatterConfig):
+        return style.kind == "colored"
+    return style in terminal_styles
+
+
+def _should_use_colors(stream: Any, force_color: Optional[bool]) -> bool:
+    """Returns whether colored output should be written to the given stream.
+
+    Parameters:
+        stream: the stream to write to; ``None`` if the sink is not a stream,
+            e.g. a file or a handler that keeps the records in memory
+        force_color: ``True`` or ``False`` to enable or disable colors
+            unconditionally; ``None`` to decide based on the ``NO_COLOR``
+            and ``FORCE_COLOR`` environment variables and on whether the
+            stream is attached to a terminal. Sinks that are not streams
+            get colors only if this argument is ``True``.
+    """
+    if force_color is not None:
+        return force_color
+    if stream is None or environ.get("NO_COLOR"):
+        return False
+    if environ.get("FORCE_COLOR"):
+        return True
+    return is_terminal(stream)
+
+
+def create_handler(
+    sink: Sink = None,
+    style: Union[str, FormatterConfig] = "fancy",
+    *,
+    force_color: Optional[bool] = None,
+) -> logging.Handler:
+    """Creates a logging handler that writes to the given sink in the given
+    style.
+
+    Parameters:
+        sink: the sink to write to. ``None`` means the standard error stream.
+            Strings and path-like objects are treated as filenames; log
+            records are appended to the file with the given name. Files
+            ending in ``.gz`` or ``.zst`` are compressed with gzip or
+            Zstandard; see `CompressedFileHandler` for details. Logging
+            handlers are used as is, but their formatter is replaced with the
+            one for the given style if they have no formatter yet. Anything
+            else is assumed to be a stream that the log records are written
+            to.
+        style: the style of the formatter; see `create_formatter()` for
+            details. Colorful styles meant for terminals (including
+            formatter configurations of the ``colored`` kind) fall back to
+            the ``plain`` style if the sink should not receive colors; see
+            `force_color`.
+        force_color: whether to keep colorful styles. ``True`` keeps the
+            colors even if the sink is not a terminal (e.g. when piping to
+            ``less -R``), ``False`` always falls back to the ``plain`` style.
+            ``None`` falls back to the ``plain`` style for files and for
+            handlers that do not write to a stream, and for streams if the
+            ``NO_COLOR`` environment variable is set; otherwise it keeps the
+            colors for streams if ``FORCE_COLOR`` is set, and only for
+            terminals if it is not.
+    """
+    stream: Any = None
+
+    if isinstance(sink, logging.Handler):
+        handler = sink
+        if handler.formatter is not None:
+            return handler
+        if not isinstance(handler, logging.FileHandler):
+            stream = getattr(handler, "stream", None)
+    elif isinstance(sink, (str, PathLike)):
+        filename = fspath(sink)
+        if filename.endswith(".gz"):
+            handler = CompressedFileHandler(filename, compression="gzip")
+        elif filename.endswith(".zst"):
+            handler = CompressedFileHandler(filename, compression="zstd")
+        else:
+            handler = logging.FileHandler(filename, encoding="utf-8")
+    else:
+        stream = sys.stderr if sink is None else sink
+        if (
+            _is_colored_style(style)
+            and _should_use_colors(stream, force_color)
+            and is_terminal(stream)
+        ):
+            handler = TerminalHandler(stream)
+        else:
+            handler = logging.StreamHandler(stream)
+
+    if _is_colored_style(style) and not _should_use_colors(stream, force_color):
+        style = "plain"
+
+    handler.setFormatter(create_formatter(style))
+    return handler
+
+
+def _get_existing_handlers() -> Iterator[logging.Handler]:
+    """Returns the handlers attached to the root logger and all the other
+    loggers that exist already.
+    """
+    yield from logging.getLogger().handlers
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(logger, logging.Logger):
+            yield from logger.handlers
+
+
+def _get_leaf_handlers(
+    handlers: Iterable[logging.Handler],
+) -> Iterator[logging.Handler]:
+    """Returns the given handlers, replacing the handlers that forward the
+    records to other handlers (like `FanOutHandler`) with the handlers that
+    they forward to.
+    """
+    for handler in handlers:
+        children = getattr(handler, "handlers", None)
+        if children is None:
+            yield handler
+        else:
+            yield from _get_leaf_handlers(children)
+
+
+def install(
+    level: int = logging.INFO,
+    style: str = "fancy",
+    *,
+    sinks: Optional[Iterable[Tuple[Sink, str]]] = None,
+    routes: Optional[Iterable[Route]] = None,
+    collapse_tracebacks: bool = False,
+    lean_records: bool = False,
+    profiler: Optional[LogProfiler] = None,
+    force_color: Optional[bool] = None,
+) -> None:
     """Install a default formatter and stream handler to the root logger of Python.
 
     This method can be used during startup to ensure that we can see the
@@ -112,11 +317,83 @@ def install(level: int = logging.INFO, style: str = "fancy") -> None:
         level: the minimum logging level of messages that actually end up in the
             log
         style: the style of the formatter; see `create_formatter()` for details.
+        sinks: optional list of sink-style pairs to send the log messages to;
+            see `create_handler()` for the list of accepted sinks. When
+            omitted, the log messages are sent to the standard error stream
+            in the style given in `style`. When multiple sinks are given,
+            the parts of the log records that are shared by all the styles
+            are calculated only once per record.
+        routes: optional list of routing rules that send the matching log
+            messages to dedicated sinks instead of the ones given in `sinks`.
+            Each message is sent to the sinks of the first matching rule.
+        collapse_tracebacks: whether to collapse tracebacks that were logged
+            recently into a single line that refers back to the first
+            occurrence of the same traceback
+        lean_records: whether to skip collecting those fields of log records
+            (caller information, thread and process names) that none of the
+            installed styles and the handlers attached to existing loggers
+            use. This is a global setting that applies to every log record
+            created afterwards; handlers added later must not rely on the
+            skipped fields, and ``stack_info=True`` has no effect if the
+            caller information is skipped. Installing again without
+            `lean_records` restores the defaults.
+        profiler: optional profiler that attributes the time spent in
+            filtering, formatting and emitting log records to the call sites
+            that created the records. Caller information is always collected
+            when a profiler is given, even if `lean_records` is set.
+        force_color: whether to keep colorful styles on streams that are not
+            terminals; see `create_handler()` for details.
     """
-    formatter = create_formatter(style)
-
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
+    install_record_factory()
+    traceback_cache.collapse_repeats = collapse_tracebacks
+
+    if sinks is None:
+        sinks = [(None, style)]
+
+    handlers = [
+        create_handler(sink, sink_style, force_color=force_color)
+        for sink, sink_style in sinks
+    ]
+    routed_handlers = [
+        (
+            route,
+            [
+                create_handler(sink, sink_style, force_color=force_color)
+                for sink, sink_style in route.sinks
+            ],
+        )
+        for route in (routes or ())
+    ]
+
+    leaf_handlers = list(chain(handlers, *(hs for _, hs in routed_handlers)))
+    if lean_records:
+        existing_handlers = _get_leaf_handlers(_get_existing_handlers())
+        disable_unused_record_fields(
+            (handler.formatter for handler in chain(leaf_handlers, existing_handlers)),
+            keep=("pathname", "lineno") if profiler else (),
+        )
+    else:
+        restore_record_fields()
+
+    if routed_handlers:
+        handler = RoutingHandler(handlers)
+        for route, route_handlers in routed_handlers:
+            handler.add_route(
+                route_handlers, semantics=route.semantics, logger=route.logger
+            )
+    elif len(handlers) == 1:
+        handler = handlers[0]
+    else:
+        handler = FanOutHandler(handlers)
+
+    # Must be done on the handler and not on the root logger because filters
+    # of loggers do not apply to records propagated from their descendants
+    handler.addFilter(inject_log_context)
+
+    if profiler is not None:
+        for leaf_handler in leaf_handlers:
+            profiler.wrap_formatter(leaf_handler)
+        handler = profiler.wrap_handler(handler)
 
     root_logger = logging.getLogger()
 
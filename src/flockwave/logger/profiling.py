@@ -0,0 +1,235 @@
+"""Diagnostic profiler that attributes the time spent in the logging machinery
+to the call sites that created the log records.
+"""
+
+import atexit
+import logging
+import sys
+
+from threading import local
+from time import perf_counter_ns
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+__all__ = ("LogProfiler",)
+
+
+CallSite = Tuple[str, str, int]
+"""Type alias for call sites, identified by the name of the logger, the
+pathname of the source file and the line number.
+"""
+
+
+class _CallSiteStats:
+    __slots__ = ("count", "samples", "filter_ns", "format_ns", "emit_ns")
+
+    def __init__(self):
+        self.count = 0
+        self.samples = 0
+        self.filter_ns = 0
+        self.format_ns = 0
+        self.emit_ns = 0
+
+    def estimate(self, value: int) -> float:
+        """Scales up a sampled duration to an estimate for all the records
+        from this call site, in milliseconds.
+        """
+        if not self.samples:
+            return 0.0
+        return value * self.count / self.samples / 1e6
+
+
+class LogProfiler:
+    """Sampling profiler that counts the log records created by each call site
+    and measures the time spent in filtering, formatting and emitting a
+    sample of these records.
+
+    The counts are exact; the durations are measured for every N-th record
+    only and are scaled up in the report. Counters are updated without
+    locking so they may be slightly off when logging from multiple threads.
+
+    Call sites are identified by the caller information of the records, so
+    the profiler is useful only if Python's logging module collects caller
+    information.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 16,
+        *,
+        dump_at_exit: bool = False,
+        file: Optional[IO[str]] = None,
+    ):
+        """Constructor.
+
+        Parameters:
+            sample_every: measure the durations for every N-th record only
+            dump_at_exit: whether to print the report when the interpreter
+                exits
+            file: the stream to print the report to; ``None`` means the
+                standard error stream
+        """
+        self._file = file
+        self._local = local()
+        self._next_sample = 0
+        self._sample_every = max(1, sample_every)
+        self._stats: Dict[CallSite, _CallSiteStats] = {}
+
+        if dump_at_exit:
+            atexit.register(self.dump)
+
+    def dump(self, limit: Optional[int] = 20) -> None:
+        """Prints the report of the profiler.
+
+        Parameters:
+            limit: the maximum number of call sites to include in the report;
+                ``None`` means all the call sites
+        """
+        print(self.report(limit), file=self._file or sys.stderr)
+
+    def report(self, limit: Optional[int] = 20) -> str:
+        """Returns the report of the profiler as a string, with the most
+        expensive call sites first.
+
+        Parameters:
+            limit: the maximum number of call sites to include in the report;
+                ``None`` means all the call sites
+        """
+        rows: List[Tuple[float, int, float, float, float, CallSite]] = []
+        for site, stats in list(self._stats.items()):
+            filter_ms = stats.estimate(stats.filter_ns)
+            format_ms = stats.estimate(stats.format_ns)
+            emit_ms = stats.estimate(stats.emit_ns)
+            total_ms = filter_ms + format_ms + emit_ms
+            rows.append((total_ms, stats.count, filter_ms, format_ms, emit_ms, site))
+
+        rows.sort(key=lambda row: (row[0], row[1]), reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+
+        lines = [
+            f"{'total ms':>10} {'count':>8} {'filter':>8} {'format':>8} "
+            f"{'emit':>8}  call site"
+        ]
+        for total_ms, count, filter_ms, format_ms, emit_ms, site in rows:
+            name, pathname, lineno = site
+            lines.append(
+                f"{total_ms:>10.1f} {count:>8} {filter_ms:>8.1f} {format_ms:>8.1f} "
+                f"{emit_ms:>8.1f}  {pathname}:{lineno} ({name})"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Clears the statistics collected so far."""
+        self._stats = {}
+
+    def wrap_formatter(self, handler: logging.Handler) -> None:
+        """Replaces the formatter of the given handler with one that measures
+        the time spent in formatting for the sampled records.
+        """
+        formatter = handler.formatter
+        if formatter is not None and not isinstance(formatter, _TimedFormatter):
+            handler.setFormatter(_TimedFormatter(formatter, self._local))
+
+    def wrap_handler(self, handler: logging.Handler) -> logging.Handler:
+        """Returns a handler that forwards all records to the given handler
+        and measures the time spent in it for the sampled records.
+        """
+        return _ProfilingHandler(handler, self)
+
+    def _get_stats(self, record: logging.LogRecord) -> _CallSiteStats:
+        site = record.name, record.pathname, record.lineno
+        stats = self._stats.get(site)
+        if stats is None:
+            stats = self._stats[site] = _CallSiteStats()
+        return stats
+
+    def _should_sample(self) -> bool:
+        self._next_sample -= 1
+        if self._next_sample <= 0:
+            self._next_sample = self._sample_every
+            return True
+        return False
+
+
+class _TimedFormatter(logging.Formatter):
+    """Formatter that wraps another formatter and measures the time spent in
+    formatting records while a sample is being taken in the current thread.
+    """
+
+    def __init__(self, wrapped: logging.Formatter, state: Any):
+        super().__init__()
+        self._state = state
+        self._wrapped = wrapped
+
+    def format(self, record: logging.LogRecord) -> str:
+        state = self._state
+        if not getattr(state, "active", False):
+            return self._wrapped.format(record)
+
+        start = perf_counter_ns()
+        try:
+            return self._wrapped.format(record)
+        finally:
+            state.format_ns += perf_counter_ns() - start
+
+
+class _ProfilingHandler(logging.Handler):
+    """Handler that forwards records to another handler and updates the
+    statistics of a `LogProfiler` along the way.
+    """
+
+    def __init__(self, wrapped: logging.Handler, profiler: LogProfiler):
+        super().__init__(wrapped.level)
+        self._profiler = profiler
+        self._wrapped = wrapped
+
+    @property
+    def handlers(self) -> List[logging.Handler]:
+        """The handler that the records are forwarded to, in a list."""
+        return [self._wrapped]
+
+    def handle(self, record: logging.LogRecord):
+        profiler = self._profiler
+        stats = profiler._get_stats(record)
+        stats.count += 1
+
+        wrapped = self._wrapped
+        if not profiler._should_sample():
+            return wrapped.handle(record)
+
+        state = profiler._local
+        state.active = True
+        state.format_ns = 0
+
+        try:
+            start = perf_counter_ns()
+            rv = wrapped.filter(record)
+            filtered_at = perf_counter_ns()
+            if isinstance(rv, logging.LogRecord):
+                record = rv
+            if rv:
+                wrapped.acquire()
+                try:
+                    wrapped.emit(record)
+                finally:
+                    wrapped.release()
+            end = perf_counter_ns()
+        finally:
+            state.active = False
+
+        stats.samples += 1
+        stats.filter_ns += filtered_at - start
+        stats.format_ns += state.format_ns
+        stats.emit_ns += max(0, end - filtered_at - state.format_ns)
+
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._wrapped.emit(record)
+
+    def flush(self) -> None:
+        self._wrapped.flush()
+
+    def close(self) -> None:
+        self._wrapped.close()
+        super().close()
@@ -0,0 +1,193 @@
+"""Log record classes used by the Flockwave logger."""
+
+import logging
+import re
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from zlib import crc32
+
+from .context import capture_log_context
+
+__all__ = (
+    "disable_unused_record_fields",
+    "get_template_id",
+    "install_record_factory",
+    "LogRecord",
+    "restore_record_fields",
+)
+
+
+_CALLER_FIELDS = frozenset(("filename", "funcName", "lineno", "module", "pathname"))
+"""Log record fields that require a stack walk when the record is created."""
+
+_OPTIONAL_FIELDS = _CALLER_FIELDS | frozenset(
+    ("process", "processName", "taskName", "thread", "threadName")
+)
+"""Log record fields that can be left out from log records."""
+
+_IDENTIFIER = re.compile(r"\w+")
+
+_SETTINGS = (
+    "_srcfile",
+    "logAsyncioTasks",
+    "logMultiprocessing",
+    "logProcesses",
+    "logThreads",
+)
+"""Module-level settings of Python's logging module that control which
+optional fields are collected in log records.
+"""
+
+_saved_settings: Optional[Dict[str, Any]] = None
+"""Values of the settings in `_SETTINGS` before they were changed by
+`disable_unused_record_fields()`, or ``None`` if they were not changed.
+"""
+
+
+class LogRecord(logging.LogRecord):
+    """Log record that memoizes the result of interpolating the arguments of
+    the record into its message template.
+
+    The message is interpolated only when the first handler asks for it, and
+    all subsequent handlers and formatters reuse the interpolated message as
+    long as the template and the arguments of the record are not replaced.
+
+    The record also keeps a reference to the active `log_context()` so the
+    attributes of the context can be added to the record later.
+    """
+
+    # The cache is stored in a slot and not in __dict__ because it refers to
+    # the original arguments of the record, which may not be picklable;
+    # handlers like QueueHandler and SocketHandler replace the arguments
+    # before pickling the record or its __dict__ for this very reason
+    __slots__ = ("_message_cache",)
+
+    _message_cache: Optional[Tuple[Any, Any, str]]
+
+    def __init__(self, *args, **kwds):
+        self._message_cache = None
+        super().__init__(*args, **kwds)
+        # The attributes of the context cannot be added here because
+        # Logger.makeRecord() refuses to override them with the extra dict
+        capture_log_context(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Leave out the message cache from pickles and copies
+        return self.__dict__
+
+    def getMessage(self) -> str:
+        msg, args = self.msg, self.args
+        try:
+            cache = self._message_cache
+        except AttributeError:
+            # Records restored from a pickle or a copy have no cache yet
+            cache = None
+        if cache is not None and cache[0] is msg and cache[1] is args:
+            return cache[2]
+
+        message = super().getMessage()
+        self._message_cache = msg, args, message
+        return message
+
+
+@lru_cache(maxsize=1024)
+def _get_template_id(template: str) -> str:
+    return "{0:08x}".format(crc32(template.encode("utf-8", "replace")))
+
+
+def get_template_id(record: logging.LogRecord) -> str:
+    """Returns a short, stable identifier of the message template of the
+    given log record.
+
+    Records logged from the same call site with different arguments share
+    the same template ID, which makes it cheap to group them in downstream
+    tools.
+    """
+    msg = record.msg
+    return _get_template_id(msg if isinstance(msg, str) else str(msg))
+
+
+def install_record_factory() -> None:
+    """Installs `LogRecord` as the log record factory of Python's logging
+    module, unless a custom log record factory is installed already.
+    """
+    if logging.getLogRecordFactory() is logging.LogRecord:
+        logging.setLogRecordFactory(LogRecord)
+
+
+def _get_fields_used_by(formatter: Optional[logging.Formatter]) -> Set[str]:
+    """Returns the optional log record fields that the given formatter may
+    use.
+    """
+    if formatter is None:
+        # Handlers without a formatter use the default one
+        return set()
+
+    cls = type(formatter)
+    if cls is not logging.Formatter and not cls.__module__.startswith(
+        "flockwave.logger."
+    ):
+        # We know nothing about third-party formatters; assume that they need
+        # everything
+        return set(_OPTIONAL_FIELDS)
+
+    fmt = getattr(formatter, "_fmt", None) or ""
+    return _OPTIONAL_FIELDS.intersection(_IDENTIFIER.findall(fmt))
+
+
+def disable_unused_record_fields(
+    formatters: Iterable[Optional[logging.Formatter]],
+    keep: Iterable[str] = (),
+) -> None:
+    """Configures Python's logging module to skip collecting the optional
+    fields of log records (caller information, thread, process and task
+    names) that none of the given formatters use.
+
+    Skipping the caller information saves a stack walk for every log record.
+    Note that this is a global setting that affects all log records created
+    afterwards, even the ones that end up in other handlers. In particular,
+    ``stack_info=True`` in logging calls has no effect when the caller
+    information is skipped, because Python collects the stack information
+    during the same stack walk. Use `restore_record_fields()` to undo the
+    changes.
+
+    Parameters:
+        formatters: the formatters whose fields must be kept
+        keep: names of additional fields to keep
+    """
+    global _saved_settings
+
+    if _saved_settings is None:
+        _saved_settings = {
+            name: getattr(logging, name) for name in _SETTINGS if hasattr(logging, name)
+        }
+
+    used: Set[str] = set(keep)
+    for formatter in formatters:
+        used.update(_get_fields_used_by(formatter))
+
+    logging.logThreads = bool(used & {"thread", "threadName"})
+    logging.logProcesses = "process" in used
+    logging.logMultiprocessing = "processName" in used
+    if hasattr(logging, "logAsyncioTasks"):
+        logging.logAsyncioTasks = "taskName" in used  # type: ignore
+
+    # Setting _srcfile to None is the documented way of disabling the stack
+    # walk in Logger.findCaller()
+    logging._srcfile = (  # type: ignore
+        _saved_settings["_srcfile"] if used & _CALLER_FIELDS else None
+    )
+
+
+def restore_record_fields() -> None:
+    """Restores the settings of Python's logging module that were changed by
+    `disable_unused_record_fields()`, so log records contain all the optional
+    fields again.
+    """
+    global _saved_settings
+
+    if _saved_settings is not None:
+        for name, value in _saved_settings.items():
+            setattr(logging, name, value)
+        _saved_settings = None
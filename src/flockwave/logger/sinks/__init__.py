@@ -0,0 +1,28 @@
+from .asynchronous import (
+    AsyncLogSink,
+    AsyncStreamAdapter,
+    AsyncioStreamAdapter,
+    TrioStreamAdapter,
+)
+from .compressed import CompressedFileHandler, get_default_compression
+from .fanout import FanOutHandler
+from .memory import LogEntry, RecentLogBuffer
+from .routing import Route, RoutingHandler
+from .terminal import is_terminal, minimize_escape_codes, TerminalHandler
+
+__all__ = (
+    "AsyncLogSink",
+    "AsyncStreamAdapter",
+    "AsyncioStreamAdapter",
+    "CompressedFileHandler",
+    "FanOutHandler",
+    "get_default_compression",
+    "is_terminal",
+    "LogEntry",
+    "minimize_escape_codes",
+    "RecentLogBuffer",
+    "Route",
+    "RoutingHandler",
+    "TerminalHandler",
+    "TrioStreamAdapter",
+)
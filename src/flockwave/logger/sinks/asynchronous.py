@@ -0,0 +1,352 @@
+"""Log sink that writes formatted log records to an asynchronous stream from
+a task running in an asyncio or Trio event loop.
+"""
+
+import logging
+
+from abc import ABC, abstractmethod
+from collections import deque
+from threading import get_ident
+from typing import Any, Deque, List, Optional
+
+from ..context import inject_log_context
+
+__all__ = (
+    "AsyncLogSink",
+    "AsyncStreamAdapter",
+    "AsyncioStreamAdapter",
+    "TrioStreamAdapter",
+)
+
+
+class AsyncStreamAdapter(ABC):
+    """Adapter that connects an `AsyncLogSink` to an asynchronous stream and
+    to the event loop of a specific async library.
+    """
+
+    @abstractmethod
+    def attach(self) -> None:
+        """Attaches the adapter to the event loop that is currently running.
+
+        Called by the sink from the task that writes the log records, before
+        any other method of the adapter is used.
+        """
+        ...
+
+    @abstractmethod
+    def detach(self) -> None:
+        """Detaches the adapter from the event loop that it was attached to.
+
+        Called by the sink when the task that writes the log records exits;
+        `notify()` does nothing until the adapter is attached again.
+        """
+        ...
+
+    @abstractmethod
+    def notify(self) -> None:
+        """Wakes up the task that is waiting in `wait()`. Must be safe to call
+        from any thread.
+
+        Raises:
+            Exception: if the event loop that the adapter is attached to has
+                already finished; the sink reports the error
+        """
+        ...
+
+    @abstractmethod
+    async def wait(self) -> None:
+        """Waits until `notify()` is called."""
+        ...
+
+    @abstractmethod
+    def create_lock(self) -> Any:
+        """Creates a lock of the async library of the adapter that the sink
+        uses to serialize the writes to the stream.
+        """
+        ...
+
+    @abstractmethod
+    async def write(self, data: bytes) -> None:
+        """Writes the given data to the underlying stream."""
+        ...
+
+    async def aclose(self) -> None:
+        """Closes the underlying stream. The default implementation does
+        nothing.
+        """
+        return None
+
+
+class AsyncioStreamAdapter(AsyncStreamAdapter):
+    """Adapter that writes to an asyncio ``StreamWriter``."""
+
+    def __init__(self, writer: Any):
+        """Constructor.
+
+        Parameters:
+            writer: the asyncio ``StreamWriter`` to write to
+        """
+        self._writer = writer
+        self._event: Any = None
+        self._loop: Any = None
+        self._thread_id: Optional[int] = None
+
+    def attach(self) -> None:
+        import asyncio
+
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._thread_id = get_ident()
+
+    def detach(self) -> None:
+        self._loop = self._event = self._thread_id = None
+
+    def notify(self) -> None:
+        # Local copies in case detach() is called from another thread
+        loop, event = self._loop, self._event
+        if loop is None or event is None:
+            return
+        if get_ident() == self._thread_id:
+            event.set()
+        else:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self) -> None:
+        await self._event.wait()
+        self._event.clear()
+
+    def create_lock(self) -> Any:
+        import asyncio
+
+        return asyncio.Lock()
+
+    async def write(self, data: bytes) -> None:
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def aclose(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+class TrioStreamAdapter(AsyncStreamAdapter):
+    """Adapter that writes to a Trio ``SendStream``."""
+
+    def __init__(self, stream: Any):
+        """Constructor.
+
+        Parameters:
+            stream: the Trio ``SendStream`` to write to
+        """
+        self._stream = stream
+        self._event: Any = None
+        self._token: Any = None
+        self._thread_id: Optional[int] = None
+
+    def attach(self) -> None:
+        import trio
+
+        self._event = trio.Event()
+        self._token = trio.lowlevel.current_trio_token()
+        self._thread_id = get_ident()
+
+    def detach(self) -> None:
+        self._token = self._event = self._thread_id = None
+
+    def notify(self) -> None:
+        # Local copies in case detach() is called from another thread
+        token, event = self._token, self._event
+        if token is None or event is None:
+            return
+        if get_ident() == self._thread_id:
+            event.set()
+        else:
+            token.run_sync_soon(self._set_event)
+
+    async def wait(self) -> None:
+        import trio
+
+        await self._event.wait()
+        self._event = trio.Event()
+
+    def create_lock(self) -> Any:
+        import trio
+
+        return trio.Lock()
+
+    async def write(self, data: bytes) -> None:
+        await self._stream.send_all(data)
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    def _set_event(self) -> None:
+        if self._event is not None:
+            self._event.set()
+
+
+class AsyncLogSink(logging.Handler):
+    """Logging handler that enqueues log records and writes them in batches
+    to an asynchronous stream from a dedicated task.
+
+    Records are appended to the queue of the sink without acquiring the
+    handler lock, and they are formatted only when the task owning the sink
+    gets to write them. The task must be started by calling `run()` from
+    the event loop; records logged before that are kept in the queue.
+
+    The synchronous `flush()` method of the handler does nothing; use
+    `aflush()` from the event loop to wait until all queued records are
+    written.
+
+    If writing to the stream fails, `run()` raises the error and the sink
+    stops accepting new records; they are counted in `dropped` instead.
+    Records logged after `run()` has exited for any other reason, e.g. after
+    the event loop has finished, are kept in the queue until `run()` is
+    called again.
+    """
+
+    def __init__(
+        self,
+        adapter: AsyncStreamAdapter,
+        level: int = logging.NOTSET,
+        *,
+        max_batch_size: int = 256,
+        max_queue_length: Optional[int] = 65536,
+    ):
+        """Constructor.
+
+        Parameters:
+            adapter: the adapter that connects the sink to the stream and the
+                event loop
+            level: the minimum level of records handled by the sink
+            max_batch_size: maximum number of records to write to the stream
+                with a single write
+            max_queue_length: maximum number of records waiting in the queue;
+                the oldest records are dropped when the queue is full.
+                ``None`` means no limit.
+        """
+        super().__init__(level)
+
+        self._adapter = adapter
+        self._max_batch_size = max(1, max_batch_size)
+        self._queue: Deque[logging.LogRecord] = deque(maxlen=max_queue_length)
+        self._stopped = False
+        self._wakeup_pending = False
+        self._write_lock: Any = None
+
+        self.dropped = 0
+        """Number of records dropped because the queue was full or the sink
+        was stopped.
+        """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._stopped:
+            self.dropped += 1
+            return
+
+        queue = self._queue
+        if queue.maxlen is not None and len(queue) >= queue.maxlen:
+            self.dropped += 1
+        queue.append(record)
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            try:
+                self._adapter.notify()
+            except Exception:
+                # Most likely the event loop has finished just now; the
+                # record stays in the queue for the next call to run()
+                self._wakeup_pending = False
+                self.handleError(record)
+
+    def handle(self, record: logging.LogRecord) -> Any:
+        # Overridden to avoid acquiring the handler lock; appending to a
+        # deque is atomic. The record is formatted later in another task, so
+        # the attributes of the log context must be added now
+        inject_log_context(record)
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    async def run(self) -> None:
+        """Writes queued log records to the stream until cancelled.
+
+        Raises:
+            Exception: if writing to the stream failed; the sink stops
+                accepting records in this case
+        """
+        self._adapter.attach()
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup_pending = False
+                    # Check again in case another thread enqueued a record
+                    # before we cleared the flag
+                    if not self._queue:
+                        await self._adapter.wait()
+                await self._write_pending()
+        except Exception:
+            self._stop()
+            raise
+        finally:
+            self._adapter.detach()
+
+    async def aflush(self) -> None:
+        """Writes all the records that are currently waiting in the queue,
+        and waits until the batch that `run()` may be writing is written.
+        """
+        await self._write_pending()
+
+    async def aclose(self) -> None:
+        """Writes all the records that are currently waiting in the queue and
+        then closes the underlying stream.
+        """
+        async with self._get_write_lock():
+            try:
+                await self._write_batches()
+            finally:
+                self._stop()
+                await self._adapter.aclose()
+        self.close()
+
+    def _get_write_lock(self) -> Any:
+        if self._write_lock is None:
+            self._write_lock = self._adapter.create_lock()
+        return self._write_lock
+
+    def _stop(self) -> None:
+        """Stops accepting new records and drops the queued ones."""
+        self._stopped = True
+        self.dropped += len(self._queue)
+        self._queue.clear()
+
+    async def _write_pending(self) -> None:
+        # All writes go through the same lock so aflush() and aclose() wait
+        # for the batch that run() is writing; this also prevents concurrent
+        # writes, which Trio does not allow on the same stream
+        async with self._get_write_lock():
+            await self._write_batches()
+
+    async def _write_batches(self) -> None:
+        queue = self._queue
+        while queue:
+            self._wakeup_pending = False
+
+            lines: List[str] = []
+            for _ in range(min(len(queue), self._max_batch_size)):
+                record = queue.popleft()
+                try:
+                    lines.append(self.format(record))
+                except Exception:
+                    self.handleError(record)
+
+            if lines:
+                count = len(lines)
+                lines.append("")
+                try:
+                    await self._adapter.write("\n".join(lines).encode("utf-8"))
+                except BaseException:
+                    self.dropped += count
+                    raise
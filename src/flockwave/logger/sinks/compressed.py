@@ -0,0 +1,267 @@
+"""Logging handler that writes log records to a compressed file, compressing
+the records in a background thread.
+"""
+
+import logging
+import os
+
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Any, BinaryIO, Callable, List, Optional, Tuple, Union
+
+__all__ = ("CompressedFileHandler", "get_default_compression")
+
+
+Compressor = Callable[[bytes], bytes]
+"""Type specification for functions that compress a chunk of data into an
+independent frame.
+"""
+
+
+def _create_zstd_compressor(level: Optional[int]) -> Optional[Compressor]:
+    """Returns a function that compresses data into a Zstandard frame, or
+    ``None`` if Zstandard is not available.
+    """
+    try:
+        from compression import zstd  # type: ignore
+    except ImportError:
+        pass
+    else:
+        return lambda data: zstd.compress(data, level)
+
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        return None
+    else:
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.compress
+
+
+def _create_gzip_compressor(level: Optional[int]) -> Compressor:
+    """Returns a function that compresses data into a gzip member."""
+    import gzip
+
+    compresslevel = 6 if level is None else level
+    return lambda data: gzip.compress(data, compresslevel, mtime=0)
+
+
+def get_default_compression() -> str:
+    """Returns the name of the best compression method that is available;
+    ``zstd`` if Zstandard support is installed, ``gzip`` otherwise.
+    """
+    return "zstd" if _create_zstd_compressor(None) is not None else "gzip"
+
+
+def _create_compressor(
+    compression: Optional[str], level: Optional[int]
+) -> Tuple[str, Compressor]:
+    if compression is None:
+        compression = get_default_compression()
+
+    if compression == "zstd":
+        compressor = _create_zstd_compressor(level)
+        if compressor is None:
+            raise RuntimeError("Zstandard compression is not available")
+    elif compression == "gzip":
+        compressor = _create_gzip_compressor(level)
+    else:
+        raise ValueError(f"unknown compression method: {compression!r}")
+
+    return compression, compressor
+
+
+class _Batch:
+    """Formatted log records waiting to be compressed into a single frame."""
+
+    __slots__ = ("first_created", "last_created", "lines", "size")
+
+    def __init__(self):
+        self.first_created = 0.0
+        self.last_created = 0.0
+        self.lines: List[bytes] = []
+        self.size = 0
+
+
+class CompressedFileHandler(logging.Handler):
+    """Logging handler that appends log records to a compressed file.
+
+    Formatted records are collected into batches, and each batch is compressed
+    into an independent frame by a worker thread. Zstandard frames and gzip
+    members can be concatenated, so the file remains readable by the standard
+    decompression tools even if the process crashes. A crash loses the
+    records that have not been written yet: the batch that is still being
+    collected (up to `frame_size` bytes or `flush_interval` seconds of
+    records, 1 MiB or 5 seconds by default), as well as the batches that
+    were handed over to the worker thread but not yet compressed and written
+    to the file.
+
+    Optionally, the handler also maintains an index file next to the log file
+    with one line for each frame, containing the offset and length of the
+    frame in the log file and the timestamps of the first and last records in
+    the frame, separated by tabs. This allows readers to seek to the frame
+    containing the records from a given time without decompressing the
+    entire file.
+    """
+
+    def __init__(
+        self,
+        filename: Union[str, "os.PathLike[str]"],
+        level: int = logging.NOTSET,
+        *,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        frame_size: int = 1048576,
+        flush_interval: float = 5,
+        index: bool = True,
+    ):
+        """Constructor.
+
+        Parameters:
+            filename: name of the file to append the log records to
+            level: the minimum level of records handled by this handler
+            compression: the compression method to use; ``zstd`` or ``gzip``.
+                ``None`` means Zstandard if it is available and gzip
+                otherwise.
+            compression_level: the compression level to use; ``None`` means
+                the default of the compression method
+            frame_size: number of bytes of uncompressed data to collect in a
+                batch before compressing it into a frame
+            flush_interval: maximum number of seconds to wait before a batch
+                is compressed and written, even if it is smaller than the
+                frame size
+            index: whether to maintain an index file with the offsets and
+                timestamps of the frames. The name of the index file is the
+                name of the log file with an ``.idx`` suffix.
+        """
+        super().__init__(level)
+
+        self.compression, self._compress = _create_compressor(
+            compression, compression_level
+        )
+
+        self.filename = os.fspath(filename)
+        self._batch = _Batch()
+        self._batch_lock = Lock()
+        self._flush_interval = flush_interval
+        self._frame_size = max(1, frame_size)
+        self._index_filename = self.filename + ".idx" if index else None
+        self._queue: "Queue[Optional[_Batch]]" = Queue()
+        self._stream: Optional[BinaryIO] = None
+        self._index_stream: Optional[Any] = None
+        self._thread: Optional[Thread] = None
+
+    def close(self) -> None:
+        with self._batch_lock:
+            thread = self._thread
+            if thread is not None:
+                self._submit_batch()
+                self._queue.put(None)
+                self._thread = None
+
+        if thread is not None:
+            thread.join()
+
+        super().close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + "\n").encode("utf-8", "replace")
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._batch_lock:
+            batch = self._batch
+            if not batch.lines:
+                batch.first_created = record.created
+            batch.last_created = record.created
+            batch.lines.append(line)
+            batch.size += len(line)
+
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name="CompressedFileHandler", daemon=True
+                )
+                self._thread.start()
+
+            if batch.size >= self._frame_size:
+                self._submit_batch()
+
+    def flush(self) -> None:
+        """Compresses and writes the current batch, and waits until all the
+        pending batches are written to the file.
+        """
+        with self._batch_lock:
+            self._submit_batch()
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def _submit_batch(self) -> None:
+        """Hands over the current batch to the worker thread. Must be called
+        with the batch lock held.
+
+        The batch lock is separate from the lock of the handler because
+        `logging.shutdown()` calls `flush()` and `close()` with the lock of
+        the handler held, and these wait for the worker thread, which must
+        be able to submit the current batch in the meanwhile.
+        """
+        if self._batch.lines:
+            self._queue.put(self._batch)
+            self._batch = _Batch()
+
+    def _run(self) -> None:
+        """Body of the worker thread that compresses and writes the batches."""
+        queue = self._queue
+        try:
+            while True:
+                try:
+                    batch = queue.get(timeout=self._flush_interval)
+                except Empty:
+                    with self._batch_lock:
+                        self._submit_batch()
+                    continue
+
+                try:
+                    if batch is None:
+                        break
+                    self._write_batch(batch)
+                except Exception:
+                    # There is no record that we could pass to handleError()
+                    # so we only report the error if Python's logging module
+                    # was configured to do so
+                    if logging.raiseExceptions:
+                        import traceback
+
+                        traceback.print_exc()
+                finally:
+                    queue.task_done()
+        finally:
+            self._close_streams()
+
+    def _write_batch(self, batch: _Batch) -> None:
+        """Compresses the given batch into a frame and appends it to the file."""
+        frame = self._compress(b"".join(batch.lines))
+
+        if self._stream is None:
+            self._stream = open(self.filename, "ab")
+
+        offset = self._stream.tell()
+        self._stream.write(frame)
+        self._stream.flush()
+
+        if self._index_filename is not None:
+            if self._index_stream is None:
+                self._index_stream = open(self._index_filename, "a", encoding="utf-8")
+            self._index_stream.write(
+                f"{offset}\t{len(frame)}\t{batch.first_created:.3f}\t"
+                f"{batch.last_created:.3f}\n"
+            )
+            self._index_stream.flush()
+
+    def _close_streams(self) -> None:
+        for stream in (self._stream, self._index_stream):
+            if stream is not None:
+                stream.close()
+        self._stream = self._index_stream = None
@@ -0,0 +1,76 @@
+"""Logging handler that forwards each log record to multiple handlers."""
+
+import logging
+
+from typing import Iterable, List
+
+from ..formatters import prepare_record
+
+__all__ = ("FanOutHandler",)
+
+
+class FanOutHandler(logging.Handler):
+    """Logging handler that forwards each log record to multiple other handlers
+    after computing the parts of the record that are shared by all the
+    formatters of this package (the interpolated message, the formatted
+    exception, the short logger name and the timestamp).
+
+    This way the shared parts are calculated only once per record, no matter
+    how many handlers the record ends up in.
+    """
+
+    handlers: List[logging.Handler]
+    """The handlers that the records are forwarded to."""
+
+    def __init__(
+        self, handlers: Iterable[logging.Handler] = (), level: int = logging.NOTSET
+    ):
+        """Constructor.
+
+        Parameters:
+            handlers: the handlers to forward the records to
+            level: the minimum level of records handled by this handler
+        """
+        super().__init__(level)
+        self.handlers = list(handlers)
+
+    def addHandler(self, handler: logging.Handler) -> None:
+        """Adds a new handler to forward the records to."""
+        if handler not in self.handlers:
+            self.handlers.append(handler)
+
+    def removeHandler(self, handler: logging.Handler) -> None:
+        """Removes a handler that the records are forwarded to."""
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+
+    def handle(self, record: logging.LogRecord):
+        # Overridden to avoid acquiring the lock of this handler; each of the
+        # wrapped handlers will acquire its own lock
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            prepare_record(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        levelno = record.levelno
+        for handler in self.handlers:
+            if levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self) -> None:
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+        super().close()
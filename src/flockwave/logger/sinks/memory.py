@@ -0,0 +1,271 @@
+"""Logging handler that keeps the most recent log records in memory so they
+can be queried and followed by other components of the application.
+"""
+
+import logging
+
+from array import array
+from typing import Callable, List, NamedTuple, Optional
+
+__all__ = ("LogEntry", "RecentLogBuffer")
+
+
+class LogEntry(NamedTuple):
+    """A single log entry stored in a `RecentLogBuffer`."""
+
+    seq: int
+    """Sequence number of the entry; increases by one for each new entry."""
+
+    created: float
+    """Time when the entry was created, as a UNIX timestamp."""
+
+    levelno: int
+    """Numeric level of the entry."""
+
+    name: str
+    """Name of the logger that created the entry."""
+
+    id: str
+    """ID attached to the entry; empty string if the entry has no ID."""
+
+    semantics: Optional[str]
+    """Semantics attached to the entry, if any."""
+
+    message: str
+    """Formatted message of the entry."""
+
+
+LogEntryFilter = Callable[[LogEntry], bool]
+"""Type specification for functions that decide whether a log entry matches
+some criteria.
+"""
+
+
+def _create_filter(
+    id: Optional[str] = None,
+    level: int = logging.NOTSET,
+    semantics: Optional[str] = None,
+) -> Optional[LogEntryFilter]:
+    """Creates a filter function for log entries from the given criteria;
+    returns ``None`` if all entries match the criteria.
+    """
+    if id is None and level <= logging.NOTSET and semantics is None:
+        return None
+
+    def matches(entry: LogEntry) -> bool:
+        return (
+            (id is None or entry.id == id)
+            and entry.levelno >= level
+            and (semantics is None or entry.semantics == semantics)
+        )
+
+    return matches
+
+
+class RecentLogBuffer(logging.Handler):
+    """Logging handler that keeps a fixed number of the most recent log
+    records in memory, in a ring buffer of columns.
+
+    The buffer can be queried for records with a given ID, level or time range
+    and it also allows other components to subscribe to newly arriving
+    records. Messages are formatted with the formatter of the handler, which
+    is set according to the style of the sink when the buffer is passed to
+    `install()` or `create_handler()`. Without a formatter, only the message
+    itself and the formatted exception are stored.
+    """
+
+    def __init__(self, capacity: int = 10000, level: int = logging.NOTSET):
+        """Constructor.
+
+        Parameters:
+            capacity: the maximum number of records to keep
+            level: the minimum level of records handled by this handler
+        """
+        super().__init__(level)
+
+        capacity = max(1, capacity)
+
+        self._capacity = capacity
+        self._created = array("d", [0.0]) * capacity
+        self._levelno = array("H", [0]) * capacity
+        self._names: List[str] = [""] * capacity
+        self._ids: List[str] = [""] * capacity
+        self._semantics: List[Optional[str]] = [None] * capacity
+        self._messages: List[str] = [""] * capacity
+        self._next_seq = 0
+        self._subscribers: List["_Subscription"] = []
+
+    @property
+    def capacity(self) -> int:
+        """The maximum number of records kept in the buffer."""
+        return self._capacity
+
+    def __len__(self) -> int:
+        return min(self._next_seq, self._capacity)
+
+    def clear(self) -> None:
+        """Removes all records from the buffer."""
+        self.acquire()
+        try:
+            self._next_seq = 0
+        finally:
+            self.release()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        seq = self._next_seq
+        index = seq % self._capacity
+        id = getattr(record, "id", None) or ""
+        semantics = getattr(record, "semantics", None)
+
+        self._created[index] = record.created
+        self._levelno[index] = min(max(record.levelno, 0), 65535)
+        self._names[index] = record.name
+        self._ids[index] = id
+        self._semantics[index] = semantics
+        self._messages[index] = message
+        self._next_seq = seq + 1
+
+        if self._subscribers:
+            entry = LogEntry(
+                seq, record.created, record.levelno, record.name, id, semantics, message
+            )
+            for subscription in self._subscribers:
+                subscription.deliver(entry)
+
+    def query(
+        self,
+        *,
+        id: Optional[str] = None,
+        level: int = logging.NOTSET,
+        semantics: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[LogEntry]:
+        """Returns the most recent log entries matching the given criteria,
+        in the order they were logged.
+
+        Parameters:
+            id: when not ``None``, return only the entries with this ID
+            level: return only the entries with at least this level
+            semantics: when not ``None``, return only the entries with the
+                given semantics
+            since: when not ``None``, return only the entries created at or
+                after this UNIX timestamp
+            until: when not ``None``, return only the entries created before
+                this UNIX timestamp
+            limit: maximum number of entries to return; the most recent ones
+                are returned if there are more matching entries
+        """
+        result: List[LogEntry] = []
+
+        self.acquire()
+        try:
+            created, levelno = self._created, self._levelno
+            ids, all_semantics = self._ids, self._semantics
+
+            end = self._next_seq
+            start = max(0, end - self._capacity)
+            for seq in range(end - 1, start - 1, -1):
+                if limit is not None and len(result) >= limit:
+                    break
+
+                index = seq % self._capacity
+                if (
+                    levelno[index] < level
+                    or (id is not None and ids[index] != id)
+                    or (semantics is not None and all_semantics[index] != semantics)
+                    # Records from different threads may arrive slightly out
+                    # of order so we cannot stop at the first old entry
+                    or (since is not None and created[index] < since)
+                    or (until is not None and created[index] >= until)
+                ):
+                    continue
+
+                result.append(
+                    LogEntry(
+                        seq,
+                        created[index],
+                        levelno[index],
+                        self._names[index],
+                        ids[index],
+                        all_semantics[index],
+                        self._messages[index],
+                    )
+                )
+        finally:
+            self.release()
+
+        result.reverse()
+        return result
+
+    def subscribe(
+        self,
+        callback: Callable[[LogEntry], None],
+        *,
+        id: Optional[str] = None,
+        level: int = logging.NOTSET,
+        semantics: Optional[str] = None,
+    ) -> Callable[[], None]:
+        """Subscribes to the log entries that are added to the buffer and
+        that match the given criteria.
+
+        The callback is called synchronously from the thread that logged the
+        record, with the lock of the handler held. It should return quickly;
+        typically it should only put the entry into a queue.
+
+        Parameters:
+            callback: the function to call with each new matching entry
+            id: when not ``None``, deliver only the entries with this ID
+            level: deliver only the entries with at least this level
+            semantics: when not ``None``, deliver only the entries with the
+                given semantics
+
+        Returns:
+            a function that cancels the subscription when called
+        """
+        subscription = _Subscription(callback, _create_filter(id, level, semantics))
+
+        self.acquire()
+        try:
+            # Copy-on-write so emit() can iterate without a copy
+            self._subscribers = self._subscribers + [subscription]
+        finally:
+            self.release()
+
+        def unsubscribe() -> None:
+            self.acquire()
+            try:
+                self._subscribers = [
+                    s for s in self._subscribers if s is not subscription
+                ]
+            finally:
+                self.release()
+
+        return unsubscribe
+
+
+class _Subscription:
+    """A subscription to the entries of a `RecentLogBuffer`."""
+
+    __slots__ = ("callback", "matches")
+
+    def __init__(
+        self, callback: Callable[[LogEntry], None], matches: Optional[LogEntryFilter]
+    ):
+        self.callback = callback
+        self.matches = matches
+
+    def deliver(self, entry: LogEntry) -> None:
+        if self.matches is None or self.matches(entry):
+            try:
+                self.callback(entry)
+            except Exception:
+                # Subscribers must not break logging
+                pass
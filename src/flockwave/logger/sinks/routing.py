@@ -0,0 +1,172 @@
+"""Logging handler that routes log records to different handlers based on the
+semantics of the records and the names of the loggers that created them.
+"""
+
+import logging
+
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ..formatters import prepare_record
+
+__all__ = ("Route", "RoutingHandler")
+
+
+class Route(NamedTuple):
+    """Specification of a routing rule for `install()`."""
+
+    sinks: Sequence[Tuple[object, str]]
+    """Sink-style pairs to send the matching log records to."""
+
+    semantics: Union[None, str, Collection[Optional[str]]] = None
+    """The semantics that the log records must have to match the rule;
+    ``None`` matches any semantics. Use ``None`` in the collection to match
+    records without semantics. A single string is treated as a collection
+    with one item.
+    """
+
+    logger: Optional[str] = None
+    """Name of the logger whose records match the rule, including the
+    records of its descendants; ``None`` matches any logger.
+    """
+
+
+class _Rule(NamedTuple):
+    handlers: Tuple[logging.Handler, ...]
+    semantics: Optional[Collection[Optional[str]]]
+    logger: Optional[str]
+
+    def matches(self, name: str, semantics: Optional[str]) -> bool:
+        if self.semantics is not None and semantics not in self.semantics:
+            return False
+        if self.logger is not None and self.logger != name:
+            return name.startswith(self.logger + ".")
+        return True
+
+
+class RoutingHandler(logging.Handler):
+    """Logging handler that forwards each log record to the handlers of the
+    first routing rule that matches the record, or to a default set of
+    handlers if no rule matches.
+
+    Rules match on the semantics of the record and on the name of the logger
+    that created it. The outcome of the matching is memoized for each logger
+    name and semantics so routing a record takes a single dictionary lookup.
+    """
+
+    _MAX_DISPATCH_TABLE_SIZE = 4096
+
+    def __init__(
+        self, handlers: Iterable[logging.Handler] = (), level: int = logging.NOTSET
+    ):
+        """Constructor.
+
+        Parameters:
+            handlers: the handlers to forward the records to if no rule
+                matches them
+            level: the minimum level of records handled by this handler
+        """
+        super().__init__(level)
+        self._default_handlers = tuple(handlers)
+        self._dispatch_table: Dict[
+            Tuple[str, Optional[str]], Tuple[logging.Handler, ...]
+        ] = {}
+        self._rules: List[_Rule] = []
+
+    @property
+    def handlers(self) -> List[logging.Handler]:
+        """All the handlers that the records may be forwarded to."""
+        result = list(self._default_handlers)
+        for rule in self._rules:
+            result.extend(h for h in rule.handlers if h not in result)
+        return result
+
+    def add_route(
+        self,
+        handlers: Iterable[logging.Handler],
+        *,
+        semantics: Union[None, str, Collection[Optional[str]]] = None,
+        logger: Optional[str] = None,
+    ) -> None:
+        """Adds a new routing rule after the existing ones.
+
+        Parameters:
+            handlers: the handlers to forward the matching records to
+            semantics: the semantics that the records must have to match the
+                rule; ``None`` matches any semantics. A single string is
+                treated as a collection with one item.
+            logger: name of the logger whose records (and the records of its
+                descendants) match the rule; ``None`` matches any logger
+        """
+        if isinstance(semantics, str):
+            semantics = frozenset((semantics,))
+        elif semantics is not None:
+            semantics = frozenset(semantics)
+        self._rules.append(_Rule(tuple(handlers), semantics, logger))
+        self._dispatch_table = {}
+
+    def handle(self, record: logging.LogRecord):
+        # Overridden to avoid acquiring the lock of this handler; each of the
+        # wrapped handlers will acquire its own lock
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        key = record.name, getattr(record, "semantics", None)
+        handlers = self._dispatch_table.get(key)
+        if handlers is None:
+            handlers = self._resolve(*key)
+
+        if len(handlers) > 1:
+            try:
+                prepare_record(record)
+            except Exception:
+                self.handleError(record)
+                return
+
+        levelno = record.levelno
+        for handler in handlers:
+            if levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self) -> None:
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+    def _resolve(
+        self, name: str, semantics: Optional[str]
+    ) -> Tuple[logging.Handler, ...]:
+        """Finds the handlers for records with the given logger name and
+        semantics, and stores them in the dispatch table.
+        """
+        for rule in self._rules:
+            if rule.matches(name, semantics):
+                handlers = rule.handlers
+                break
+        else:
+            handlers = self._default_handlers
+
+        table = self._dispatch_table
+        if len(table) >= self._MAX_DISPATCH_TABLE_SIZE:
+            table.clear()
+        table[name, semantics] = handlers
+
+        return handlers
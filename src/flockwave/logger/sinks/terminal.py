@@ -0,0 +1,204 @@
+"""Logging handler optimized for writing colored log output to a terminal."""
+
+import logging
+import re
+
+from functools import lru_cache
+from threading import Event, Thread
+from time import monotonic, sleep
+from typing import Any, List, Optional
+
+__all__ = ("is_terminal", "minimize_escape_codes", "TerminalHandler")
+
+
+_SGR_SEQUENCE = re.compile(r"(\x1b\[[0-9;]*m)")
+"""Regular expression matching ANSI "select graphic rendition" escape
+sequences; these are the ones that set colors and text attributes.
+"""
+
+_RESET_SEQUENCES = frozenset(("\x1b[0m", "\x1b[m"))
+
+_WHITESPACE_SAFE_SGR_PARAMS = frozenset(
+    ["1", "2", "3", "22", "23", "39"]
+    + [str(i) for i in range(30, 38)]
+    + [str(i) for i in range(90, 98)]
+)
+"""SGR parameters that have no visible effect on whitespace; these are the
+ones that set the foreground color, the intensity or italics. Resets are not
+included because they may turn off attributes that are visible on whitespace,
+like the background color.
+"""
+
+
+@lru_cache(maxsize=256)
+def _is_whitespace_safe(sequence: str) -> bool:
+    """Returns whether the given SGR escape sequence has no visible effect on
+    whitespace.
+    """
+    params = sequence[2:-1].split(";")
+    return all(param in _WHITESPACE_SAFE_SGR_PARAMS for param in params)
+
+
+def _apply_pending_sequences(
+    pending: List[str], emitted: List[str], result: List[str]
+) -> None:
+    """Helper function for `minimize_escape_codes()` that writes the pending
+    escape sequences to the result, skipping the ones that repeat the last
+    sequence in effect.
+    """
+    for seq in pending:
+        if not emitted or emitted[-1] != seq:
+            result.append(seq)
+            emitted.append(seq)
+    pending.clear()
+
+
+def minimize_escape_codes(text: str) -> str:
+    """Removes redundant ANSI color escape sequences from the given text
+    without changing how the text looks on the terminal.
+
+    Sequences are redundant if they repeat the last sequence emitted since
+    the last reset, if they reset the attributes when there is nothing to
+    reset, or if they would only apply to whitespace that they do not affect.
+    """
+    result: List[str] = []
+    emitted: List[str] = []  # sequences in effect since the last reset
+    pending: List[str] = []  # sequences not written yet
+
+    for piece in _SGR_SEQUENCE.split(text):
+        if not piece:
+            continue
+
+        if piece[0] == "\x1b":
+            if piece in _RESET_SEQUENCES:
+                pending.clear()
+                if emitted:
+                    result.append(piece)
+                    emitted.clear()
+            elif not pending or pending[-1] != piece:
+                pending.append(piece)
+            continue
+
+        if pending:
+            if piece.isspace() and all(_is_whitespace_safe(seq) for seq in pending):
+                # Postpone the sequences until they affect something visible
+                result.append(piece)
+                continue
+
+            _apply_pending_sequences(pending, emitted, result)
+
+        result.append(piece)
+
+    # Sequences at the end must be kept as they affect subsequent output
+    result.extend(pending)
+
+    return "".join(result)
+
+
+def is_terminal(stream: Any) -> bool:
+    """Returns whether the given stream is attached to a terminal."""
+    isatty = getattr(stream, "isatty", None)
+    try:
+        return bool(isatty and isatty())
+    except Exception:
+        # Closed or detached streams may throw an exception
+        return False
+
+
+class TerminalHandler(logging.StreamHandler):
+    """Logging handler that writes log records to a terminal, coalescing the
+    records into frames such that the terminal receives at most a given
+    number of writes per second.
+
+    The first record after a quiet period is written immediately; records
+    arriving shortly after are collected and written in one go at the end of
+    the current frame. Redundant ANSI escape sequences are removed from each
+    frame before it is written.
+    """
+
+    def __init__(self, stream: Any = None, *, max_frame_rate: float = 30):
+        """Constructor.
+
+        Parameters:
+            stream: the stream to write to; ``None`` means the standard error
+                stream
+            max_frame_rate: maximum number of writes to the terminal per
+                second
+        """
+        super().__init__(stream)
+
+        self._buffer: List[str] = []
+        self._closed = False
+        self._frame_interval = 1 / max_frame_rate if max_frame_rate > 0 else 0
+        self._last_write_at = 0.0
+        self._thread: Optional[Thread] = None
+        self._wakeup = Event()
+
+    def close(self) -> None:
+        self.flush()
+        self._closed = True
+        self._wakeup.set()
+        super().close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record) + self.terminator)
+            now = monotonic()
+            if now - self._last_write_at >= self._frame_interval:
+                self._write_frame(now)
+            else:
+                self._schedule_frame()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer:
+                self._write_frame(monotonic())
+            elif self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def _run(self) -> None:
+        """Body of the thread that writes the frames that could not be written
+        immediately.
+        """
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            delay = self._last_write_at + self._frame_interval - monotonic()
+            if delay > 0:
+                sleep(delay)
+
+            try:
+                self.flush()
+            except Exception:
+                # Nothing we could do; the next frame will try again
+                pass
+
+    def _schedule_frame(self) -> None:
+        """Ensures that the buffered records will be written at the end of the
+        current frame.
+        """
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="TerminalHandler", daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def _write_frame(self, now: float) -> None:
+        """Writes the buffered records to the stream. Must be called with the
+        lock of the handler held.
+        """
+        data = minimize_escape_codes("".join(self._buffer))
+        self._buffer.clear()
+        self._last_write_at = now
+
+        stream = self.stream
+        stream.write(data)
+        if hasattr(stream, "flush"):
+            stream.flush()
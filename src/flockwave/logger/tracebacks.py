@@ -0,0 +1,201 @@
+"""Cache of formatted exceptions and tracebacks, used by the formatters of this
+package so error storms with the same exception over and over again do not
+need to pay the cost of formatting the traceback for every log record.
+"""
+
+import logging
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Hashable, List, Optional
+
+__all__ = ("format_exception", "TracebackCache", "traceback_cache")
+
+
+def _get_exception_signature(ei: Any) -> Optional[Hashable]:
+    """Returns a hashable signature of the given exception info tuple that
+    identifies its formatted representation, or ``None`` if the exception
+    cannot be cached.
+
+    The signature consists of the types and the messages of all the exceptions
+    in the exception chain, and the code locations of their tracebacks.
+    """
+    exc, tb = ei[1], ei[2]
+    if exc is None:
+        return None
+
+    parts: List[Hashable] = []
+    seen = set()
+    link = None
+
+    while exc is not None:
+        if id(exc) in seen or hasattr(exc, "exceptions"):
+            # Cycles in the exception chain and exception groups are rare;
+            # don't bother with them
+            return None
+        seen.add(id(exc))
+
+        locations = []
+        while tb is not None:
+            locations.append((tb.tb_frame.f_code, tb.tb_lasti))
+            tb = tb.tb_next
+
+        try:
+            message = str(exc)
+        except Exception:
+            return None
+
+        notes = getattr(exc, "__notes__", None)
+        parts.append(
+            (
+                type(exc),
+                message,
+                tuple(locations),
+                tuple(str(note) for note in notes) if notes else (),
+                link,
+            )
+        )
+
+        if exc.__cause__ is not None:
+            exc, link = exc.__cause__, "cause"
+        elif exc.__context__ is not None and not exc.__suppress_context__:
+            exc, link = exc.__context__, "context"
+        else:
+            break
+
+        tb = exc.__traceback__
+
+    return tuple(parts)
+
+
+def _summarize_exception(exc: BaseException) -> str:
+    """Returns a one-line summary of the given exception, consisting of the
+    name of its type and the first line of its message.
+    """
+    cls = type(exc)
+    name = cls.__qualname__
+    if cls.__module__ not in ("builtins", "__main__"):
+        name = f"{cls.__module__}.{name}"
+
+    try:
+        message = str(exc).partition("\n")[0]
+    except Exception:
+        message = ""
+
+    return f"{name}: {message}" if message else name
+
+
+class _Entry:
+    __slots__ = ("index", "last_shown_at", "summary", "text")
+
+    def __init__(self, text: str, summary: str, index: int):
+        self.index = index
+        self.last_shown_at = monotonic()
+        self.summary = summary
+        self.text = text
+
+
+class TracebackCache:
+    """Bounded LRU cache of formatted exceptions, keyed by the types and
+    messages of the exceptions and the code locations of their tracebacks.
+
+    Optionally, the cache may also collapse repeated tracebacks into a short
+    reference to an earlier occurrence of the same traceback.
+    """
+
+    collapse_repeats: bool
+    """Whether repeated tracebacks are collapsed into a single line that
+    refers back to the first occurrence of the traceback.
+    """
+
+    collapse_interval: float
+    """Number of seconds after which a collapsed traceback is shown in full
+    again.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        *,
+        collapse_repeats: bool = False,
+        collapse_interval: float = 60,
+    ):
+        """Constructor.
+
+        Parameters:
+            maxsize: maximum number of formatted exceptions to keep
+            collapse_repeats: whether repeated tracebacks are collapsed into
+                a single line that refers back to the first occurrence of the
+                traceback
+            collapse_interval: number of seconds after which a collapsed
+                traceback is shown in full again
+        """
+        self.collapse_repeats = collapse_repeats
+        self.collapse_interval = collapse_interval
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._formatter = logging.Formatter()
+        self._lock = Lock()
+        self._maxsize = max(1, maxsize)
+        self._next_index = 1
+
+    def clear(self) -> None:
+        """Removes all formatted exceptions from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def format(self, ei: Any) -> str:
+        """Formats the given exception info tuple, reusing an earlier
+        formatted representation if possible.
+        """
+        key = _get_exception_signature(ei)
+        if key is None:
+            return self._formatter.formatException(ei)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            # Format outside the lock; formatting may take a while
+            text = self._formatter.formatException(ei)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _Entry(
+                        text, _summarize_exception(ei[1]), self._next_index
+                    )
+                    self._next_index += 1
+                    while len(self._entries) > self._maxsize:
+                        self._entries.popitem(last=False)
+                    return self._numbered(entry)
+
+        if self.collapse_repeats:
+            now = monotonic()
+            if now - entry.last_shown_at < self.collapse_interval:
+                return f"Traceback #{entry.index} repeated: {entry.summary}"
+            entry.last_shown_at = now
+            return self._numbered(entry)
+
+        return entry.text
+
+    def _numbered(self, entry: _Entry) -> str:
+        """Returns the full formatted traceback of the given entry, numbered
+        if repeats are collapsed so the collapsed repeats can refer to it.
+        """
+        if self.collapse_repeats and entry.text.startswith("Traceback ("):
+            return f"Traceback #{entry.index} {entry.text[10:]}"
+        return entry.text
+
+
+traceback_cache = TracebackCache()
+"""Traceback cache shared by all formatters of this package."""
+
+
+def format_exception(ei: Any) -> str:
+    """Formats the given exception info tuple using the shared traceback
+    cache.
+    """
+    return traceback_cache.format(ei)
@@ -1,10 +1,13 @@
 import logging
 
-from typing import Any, Literal, Optional
+from functools import lru_cache
+from sys import intern
+from types import MappingProxyType
+from typing import Any, Literal, Mapping, Optional
 
 from .hexdump import hexdump
 
-__all__ = ("format_hexdump", "log_hexdump", "nop")
+__all__ = ("format_hexdump", "log_hexdump", "nop", "TrafficLogger")
 
 Direction = Literal["in", "out"]
 
@@ -32,6 +35,12 @@ def create_extra_args_for_logging_traffic(
     """Creates the "extra" dict for a log entry that logs communication from
     the given address in the given direction.
     """
+    return dict(_get_extra_args_for_logging_traffic(address, direction))
+
+
+def _create_extra_args_for_logging_traffic(
+    address: Any, direction: Optional[Direction]
+) -> Mapping[str, str]:
     extra = {}
     if direction == "in":
         extra["semantics"] = "inbound"
@@ -41,9 +50,81 @@ def create_extra_args_for_logging_traffic(
     if address:
         if not isinstance(address, str):
             address = repr(address)
-        extra["id"] = address[len(address) - 10 :]
+        extra["id"] = intern(address[len(address) - 10 :])
+
+    return MappingProxyType(extra)
+
+
+_create_extra_args_for_logging_traffic_cached = lru_cache(maxsize=1024, typed=True)(
+    _create_extra_args_for_logging_traffic
+)
+
+
+def _get_extra_args_for_logging_traffic(
+    address: Any, direction: Optional[Direction]
+) -> Mapping[str, str]:
+    """Returns a shared, read-only "extra" dict for a log entry that logs
+    communication from the given address in the given direction.
+
+    Results are cached for hashable addresses so we do not need to call
+    ``repr()`` on the same address over and over again.
+    """
+    try:
+        return _create_extra_args_for_logging_traffic_cached(address, direction)
+    except TypeError:
+        # Address is not hashable
+        return _create_extra_args_for_logging_traffic(address, direction)
 
-    return extra
+
+class TrafficLogger:
+    """Helper object that logs hex dumps of the traffic of a single connection
+    to a given logger.
+
+    The "extra" dicts of the log records are calculated only once, when the
+    object is constructed, so it is advised to create a traffic logger for
+    each connection once and then reuse it.
+    """
+
+    def __init__(
+        self, log: logging.Logger, address: Any = None, level: int = logging.DEBUG
+    ):
+        """Constructor.
+
+        Parameters:
+            log: the logger to log the data to
+            address: the address of the remote end of the connection
+            level: the level of the log records
+        """
+        self._log = log
+        self._level = level
+        self._extra = {
+            direction: _get_extra_args_for_logging_traffic(address, direction)
+            for direction in (None, "in", "out")
+        }
+
+    def log(self, data: bytes, direction: Optional[Direction] = None) -> None:
+        """Logs a hex dump of the given data, traveling in the given
+        direction.
+        """
+        self._log_hexdump(data, direction)
+
+    def inbound(self, data: bytes) -> None:
+        """Logs a hex dump of the given inbound data."""
+        self._log_hexdump(data, "in")
+
+    def outbound(self, data: bytes) -> None:
+        """Logs a hex dump of the given outbound data."""
+        self._log_hexdump(data, "out")
+
+    def _log_hexdump(self, data: bytes, direction: Optional[Direction]) -> None:
+        # stacklevel=3 attributes the record to the caller of the public method
+        if self._log.isEnabledFor(self._level):
+            self._log.log(
+                self._level,
+                format_hexdump(data),
+                extra=self._extra[direction],
+                stacklevel=3,
+            )
 
 
 def log_hexdump(
@@ -57,13 +138,17 @@ def log_hexdump(
     """Helper function for logging hex dumps of raw bytes, typically associated
     to some network traffic.
 
+    Use `TrafficLogger` instead if you need to log many hex dumps with the
+    same address.
+
     Parameters:
         log: the logger to log the data to
         data: the data to log
     """
-    message = format_hexdump(data)
-    extra = create_extra_args_for_logging_traffic(address, direction)
-    log.log(level, message, extra=extra)
+    if log.isEnabledFor(level):
+        message = format_hexdump(data)
+        extra = _get_extra_args_for_logging_traffic(address, direction)
+        log.log(level, message, extra=extra, stacklevel=2)
 
 
 def nop(*args, **kwds) -> None:
@@ -0,0 +1,428 @@
+"""Load generator and soak test harness that simulates a drone fleet logging
+its traffic and status messages.
+
+Each configuration (style and handler mode) is run in a separate process so
+the peak memory usage can be measured independently. Output goes to the null
+device or to a temporary file on a tmpfs, so the harness runs fully offline.
+
+Usage::
+
+    python test/soak.py --fleet-size 50 --duration 10 --styles fancy json
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from array import array
+from time import perf_counter, perf_counter_ns
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MIX = {
+    "inbound": 4,
+    "outbound": 4,
+    "request": 1,
+    "response_success": 1,
+    "notification": 1,
+    "debug": 2,
+}
+"""Default message mix, mapping the semantics of messages to their relative
+frequencies. ``debug`` stands for status messages without semantics.
+"""
+
+MODES = ("single", "fanout", "routed", "async", "terminal", "compressed")
+"""Handler modes supported by the harness. ``terminal`` uses the coalescing
+terminal handler and ``compressed`` writes a compressed log file to a
+temporary directory, regardless of the ``--sink`` option.
+"""
+
+STYLES = ("fancy", "colorful", "symbolic", "plain", "tabular", "json")
+"""Logging styles supported by the harness."""
+
+
+class CountingFilter(logging.Filter):
+    """Logging filter that counts the records that pass through it."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.count += 1
+        return True
+
+
+class FileWriter:
+    """Minimal asyncio ``StreamWriter`` lookalike that writes to a file
+    synchronously, for running the asynchronous sink against regular files.
+    """
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    def write(self, data: bytes) -> None:
+        self._stream.write(data)
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._stream.close()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+def get_temporary_directory() -> str:
+    """Returns the directory to create temporary files in; a tmpfs if there is
+    one.
+    """
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def open_sink(kind: str, binary: bool = False) -> Any:
+    """Opens a stream for the output of the harness."""
+    mode = "wb" if binary else "w"
+    if kind == "null":
+        return open(os.devnull, mode)
+
+    return tempfile.TemporaryFile(mode, dir=get_temporary_directory())
+
+
+def create_stream_handler(style: str, stream: Any) -> logging.Handler:
+    """Creates a stream handler with the formatter of the given style, keeping
+    the colors of the terminal styles even though the sink is not a terminal.
+    """
+    from flockwave.logger import create_handler
+
+    return create_handler(stream, style, force_color=True)
+
+
+def create_compressed_file_handler(style: str) -> logging.Handler:
+    """Creates a compressed file handler that writes to a temporary directory
+    with the formatter of the given style. The directory is removed when the
+    process exits.
+    """
+    from flockwave.logger import create_formatter
+    from flockwave.logger.sinks import CompressedFileHandler, get_default_compression
+
+    directory = tempfile.mkdtemp(dir=get_temporary_directory())
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+
+    suffix = ".zst" if get_default_compression() == "zstd" else ".gz"
+    handler = CompressedFileHandler(os.path.join(directory, "soak.log" + suffix))
+    handler.setFormatter(create_formatter(style))
+    return handler
+
+
+def set_up_logging(
+    style: str, mode: str, options: Any
+) -> Tuple[List[List[CountingFilter]], Optional[Any]]:
+    """Installs the logging configuration for the given style and handler
+    mode.
+
+    Returns:
+        groups of counting filters attached to the handlers at the end of the
+        pipeline such that each record is expected to pass through exactly one
+        filter in each group, and the asynchronous sink if the mode uses one
+    """
+    from flockwave.logger import create_formatter, install, Route
+    from flockwave.logger.sinks import (
+        AsyncioStreamAdapter,
+        AsyncLogSink,
+        RecentLogBuffer,
+        TerminalHandler,
+    )
+
+    level = getattr(logging, options.level)
+    handlers: List[logging.Handler] = []
+    routes = None
+    async_sink = None
+
+    if mode == "single":
+        handlers.append(create_stream_handler(style, open_sink(options.sink)))
+    elif mode == "fanout":
+        handlers.append(create_stream_handler(style, open_sink(options.sink)))
+        handlers.append(create_stream_handler("json", open_sink(options.sink)))
+    elif mode == "routed":
+        handlers.append(create_stream_handler(style, open_sink(options.sink)))
+        buffer = RecentLogBuffer(capacity=10000)
+        routes = [Route(sinks=[(buffer, "plain")], semantics=("inbound", "outbound"))]
+    elif mode == "async":
+        writer = FileWriter(open_sink(options.sink, binary=True))
+        async_sink = AsyncLogSink(AsyncioStreamAdapter(writer))
+        async_sink.setFormatter(create_formatter(style))
+        handlers.append(async_sink)
+    elif mode == "terminal":
+        terminal = TerminalHandler(open_sink(options.sink))
+        terminal.setFormatter(create_formatter(style))
+        handlers.append(terminal)
+    elif mode == "compressed":
+        handlers.append(create_compressed_file_handler(style))
+    else:
+        raise ValueError(f"unknown mode: {mode!r}")
+
+    groups = [[handler] for handler in handlers]
+    for route in routes or ():
+        # Routed records end up in one of the handlers, not in all of them
+        groups = [sum(groups, []) + [sink for sink, _ in route.sinks]]
+
+    counters = []
+    for group in groups:
+        counters.append([])
+        for handler in group:
+            counter = CountingFilter()
+            handler.addFilter(counter)
+            counters[-1].append(counter)
+
+    install(level, sinks=[(handler, style) for handler in handlers], routes=routes)
+    return counters, async_sink
+
+
+class Stats:
+    """Statistics collected while running a scenario."""
+
+    def __init__(self, level: int):
+        self.expected = 0
+        self.latencies = array("q")
+        self.level = level
+        self.logged = 0
+
+    def measure(self, level: int, func, *args, **kwds) -> None:
+        """Calls the given logging function that logs a record on the given
+        level, and measures how long the call takes.
+        """
+        start = perf_counter_ns()
+        func(*args, **kwds)
+        self.latencies.append(perf_counter_ns() - start)
+        self.logged += 1
+        if level >= self.level:
+            self.expected += 1
+
+
+async def simulate_uav(
+    index: int, stats: Stats, options: Any, mix: Dict[str, int]
+) -> None:
+    """Simulates a single UAV that logs its traffic and status messages."""
+    from flockwave.logger import add_id_to_log, TrafficLogger
+
+    rng = random.Random(options.seed + index)
+    uav_id = f"UAV-{index:02}"
+    log = add_id_to_log(logging.getLogger("soak.uav"), uav_id)
+    traffic = TrafficLogger(
+        logging.getLogger("soak.conn"), address=(f"10.0.0.{index}", 14550)
+    )
+
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    interval = 1 / options.packet_rate
+    packet = bytes(rng.randrange(256) for _ in range(options.packet_size))
+    seq = 0
+
+    while True:
+        await asyncio.sleep(interval * rng.uniform(0.5, 1.5))
+        seq += 1
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "inbound":
+            stats.measure(logging.DEBUG, traffic.inbound, packet)
+        elif kind == "outbound":
+            stats.measure(logging.DEBUG, traffic.outbound, packet)
+        elif kind == "debug":
+            stats.measure(
+                logging.DEBUG,
+                log.debug,
+                "Battery at %d%%, seq %d",
+                100 - seq % 100,
+                seq,
+            )
+        else:
+            stats.measure(
+                logging.INFO,
+                log.info,
+                "Message %d from %s",
+                seq,
+                uav_id,
+                extra={"semantics": kind},
+            )
+
+
+async def simulate_exception_storms(stats: Stats, options: Any) -> None:
+    """Simulates storms of repeated exceptions from a reconnecting link."""
+    from flockwave.logger import add_id_to_log
+
+    rng = random.Random(options.seed)
+    while True:
+        await asyncio.sleep(options.storm_interval)
+        index = rng.randrange(options.fleet_size)
+        log = add_id_to_log(logging.getLogger("soak.link"), f"UAV-{index:02}")
+        for _ in range(options.storm_size):
+            try:
+                raise ConnectionResetError("Connection reset by peer")
+            except ConnectionResetError:
+                stats.measure(logging.ERROR, log.exception, "Link lost, reconnecting")
+
+
+async def run_fleet(options: Any, async_sink: Optional[Any]) -> Tuple[Stats, float]:
+    """Runs the simulated fleet for the given duration."""
+    stats = Stats(getattr(logging, options.level))
+    mix = dict(DEFAULT_MIX)
+    if options.mix:
+        mix = json.loads(options.mix)
+
+    tasks = [
+        asyncio.create_task(simulate_uav(i, stats, options, mix))
+        for i in range(options.fleet_size)
+    ]
+    if options.storm_size > 0:
+        tasks.append(asyncio.create_task(simulate_exception_storms(stats, options)))
+    if async_sink is not None:
+        sink_task = asyncio.create_task(async_sink.run())
+
+    start = perf_counter()
+    await asyncio.sleep(options.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    if async_sink is not None:
+        await async_sink.aflush()
+        sink_task.cancel()
+        await asyncio.gather(sink_task, return_exceptions=True)
+
+    return stats, perf_counter() - start
+
+
+def percentile(sorted_values: List[int], q: float) -> float:
+    """Returns the given percentile of a sorted list of values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return float(sorted_values[index])
+
+
+def run_scenario(style: str, mode: str, options: Any) -> Dict[str, Any]:
+    """Runs a single scenario in the current process and returns its results."""
+    import resource
+
+    counters, async_sink = set_up_logging(style, mode, options)
+    stats, elapsed = asyncio.run(run_fleet(options, async_sink))
+    logging.shutdown()
+
+    latencies = sorted(stats.latencies)
+    logging_time = sum(latencies) / 1e9
+    received = min(sum(counter.count for counter in group) for group in counters)
+    if async_sink is not None:
+        received -= async_sink.dropped
+
+    return {
+        "style": style,
+        "mode": mode,
+        "records": stats.logged,
+        "offered_rate": stats.logged / elapsed if elapsed > 0 else 0.0,
+        "capacity": stats.logged / logging_time if logging_time > 0 else 0.0,
+        "p50_us": percentile(latencies, 0.5) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "dropped": max(0, stats.expected - received),
+    }
+
+
+def run_in_subprocess(style: str, mode: str, argv: List[str]) -> Dict[str, Any]:
+    """Runs a single scenario in a separate Python process."""
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+
+    output = subprocess.run(
+        [sys.executable, __file__, *argv, "--run", f"{style}:{mode}"],
+        check=True,
+        stdout=subprocess.PIPE,
+        env=env,
+    ).stdout
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """Prints the results of the scenarios as a table."""
+    header = (
+        f"{'style':<10} {'mode':<10} {'records':>8} {'capacity/s':>11} "
+        f"{'p50 us':>8} {'p99 us':>8} {'RSS KiB':>9} {'dropped':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['style']:<10} {r['mode']:<10} {r['records']:>8} "
+            f"{r['capacity']:>11.0f} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} "
+            f"{r['peak_rss_kb']:>9} {r['dropped']:>8}"
+        )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fleet-size", type=int, default=20, help="number of UAVs")
+    parser.add_argument(
+        "--duration", type=float, default=5, help="duration of each run, in seconds"
+    )
+    parser.add_argument(
+        "--packet-rate", type=float, default=50, help="messages per second per UAV"
+    )
+    parser.add_argument(
+        "--packet-size", type=int, default=40, help="size of packets, in bytes"
+    )
+    parser.add_argument(
+        "--mix",
+        default=None,
+        help="message mix as a JSON object mapping semantics to weights",
+    )
+    parser.add_argument(
+        "--storm-interval",
+        type=float,
+        default=1,
+        help="seconds between exception storms",
+    )
+    parser.add_argument(
+        "--storm-size", type=int, default=50, help="number of exceptions per storm"
+    )
+    parser.add_argument("--level", default="DEBUG", help="minimum logging level")
+    parser.add_argument("--sink", choices=("null", "tmpfs"), default="null")
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=list(STYLES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    parser = create_parser()
+    options = parser.parse_args()
+
+    if options.run:
+        style, _, mode = options.run.partition(":")
+        print(json.dumps(run_scenario(style, mode, options)))
+        return
+
+    argv = [arg for arg in sys.argv[1:] if arg != "--json"]
+    results = [
+        run_in_subprocess(style, mode, argv)
+        for style in options.styles
+        for mode in options.modes
+    ]
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
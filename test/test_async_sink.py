@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from flockwave.logger.sinks import AsyncioStreamAdapter, AsyncLogSink
+
+
+class SlowStreamWriter:
+    def __init__(self):
+        self.data = b""
+        self.pending = b""
+        self.release = None
+        self.error = None
+
+    def write(self, data):
+        if self.error:
+            raise self.error
+        self.pending += data
+
+    async def drain(self):
+        if self.release is not None:
+            await self.release.wait()
+        self.data += self.pending
+        self.pending = b""
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def _make_record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+def test_aflush_waits_for_write_in_progress():
+    writer = SlowStreamWriter()
+    sink = AsyncLogSink(AsyncioStreamAdapter(writer))
+
+    async def main():
+        writer.release = asyncio.Event()
+        task = asyncio.create_task(sink.run())
+
+        sink.handle(_make_record("first"))
+        await asyncio.sleep(0.01)
+        # run() is now blocked in the middle of writing the first record
+        sink.handle(_make_record("second"))
+
+        flush = asyncio.create_task(sink.aflush())
+        await asyncio.sleep(0.01)
+        assert not flush.done()
+
+        writer.release.set()
+        await flush
+        assert writer.data == b"first\nsecond\n"
+
+        await sink.aclose()
+        task.cancel()
+
+    asyncio.run(main())
+
+
+def test_write_error_stops_the_sink():
+    writer = SlowStreamWriter()
+    writer.error = OSError("broken pipe")
+    sink = AsyncLogSink(AsyncioStreamAdapter(writer))
+
+    async def main():
+        task = asyncio.create_task(sink.run())
+        sink.handle(_make_record("first"))
+        with pytest.raises(OSError):
+            await task
+
+    asyncio.run(main())
+
+    sink.handle(_make_record("second"))
+    assert sink.dropped == 2
+
+
+def test_trio_sink_writes_all_records_on_close():
+    trio = pytest.importorskip("trio")
+    from trio.testing import MemorySendStream
+
+    from flockwave.logger.sinks import TrioStreamAdapter
+
+    stream = MemorySendStream()
+    sink = AsyncLogSink(TrioStreamAdapter(stream), max_batch_size=2)
+
+    async def main():
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(sink.run)
+            for index in range(5):
+                sink.handle(_make_record(f"line {index}"))
+            await sink.aclose()
+            nursery.cancel_scope.cancel()
+
+    trio.run(main)
+
+    data = stream.get_data_nowait()
+    assert data.decode("utf-8").splitlines() == [f"line {i}" for i in range(5)]
+
+
+def _log_from_thread(sink, message):
+    thread = threading.Thread(target=sink.handle, args=(_make_record(message),))
+    thread.start()
+    thread.join()
+
+
+def test_logging_after_asyncio_loop_has_finished():
+    writer = SlowStreamWriter()
+    sink = AsyncLogSink(AsyncioStreamAdapter(writer))
+
+    async def main():
+        task = asyncio.create_task(sink.run())
+        sink.handle(_make_record("first"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(main())
+
+    # The loop is closed now; these must not raise into the caller
+    sink.handle(_make_record("second"))
+    _log_from_thread(sink, "third")
+
+    async def resume():
+        task = asyncio.create_task(sink.run())
+        await sink.aclose()
+        task.cancel()
+
+    asyncio.run(resume())
+    assert writer.data == b"first\nsecond\nthird\n"
+
+
+def test_logging_after_trio_run_has_finished():
+    trio = pytest.importorskip("trio")
+    from trio.testing import MemorySendStream
+
+    from flockwave.logger.sinks import TrioStreamAdapter
+
+    stream = MemorySendStream()
+    sink = AsyncLogSink(TrioStreamAdapter(stream))
+
+    async def main():
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(sink.run)
+            await trio.sleep(0.01)
+            nursery.cancel_scope.cancel()
+
+    trio.run(main)
+
+    sink.handle(_make_record("first"))
+    _log_from_thread(sink, "second")
+    assert sink.dropped == 0
+
+
+def test_notify_errors_are_reported(monkeypatch):
+    adapter = AsyncioStreamAdapter(SlowStreamWriter())
+    sink = AsyncLogSink(adapter)
+    errors = []
+    monkeypatch.setattr(sink, "handleError", errors.append)
+
+    def notify():
+        raise RuntimeError("Event loop is closed")
+
+    monkeypatch.setattr(adapter, "notify", notify)
+
+    sink.handle(_make_record("first"))
+    sink.handle(_make_record("second"))
+    assert [record.msg for record in errors] == ["first", "second"]
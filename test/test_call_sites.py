@@ -0,0 +1,71 @@
+import logging
+
+from flockwave.logger import add_id_to_log, log_hexdump, TrafficLogger
+
+
+class RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _log_with(log, func):
+    collector = RecordCollector()
+    log.addHandler(collector)
+    log.setLevel(logging.DEBUG)
+    try:
+        func()
+    finally:
+        log.removeHandler(collector)
+    return collector.records
+
+
+def _lineno_of(marker):
+    with open(__file__) as fp:
+        for lineno, line in enumerate(fp, 1):
+            if line.rstrip().endswith(marker):
+                return lineno
+    raise ValueError(marker)
+
+
+def test_wrapper_reports_caller():
+    log = logging.getLogger("test_call_sites.wrapper")
+    wrapper = add_id_to_log(log, "UAV-17")
+
+    def func():
+        wrapper.info("first")  # marker:first
+        wrapper.log(logging.INFO, "second", stacklevel=1)  # marker:second
+
+    records = _log_with(log, func)
+
+    assert [r.pathname for r in records] == [__file__] * 2
+    assert [r.lineno for r in records] == [
+        _lineno_of("marker:first"),
+        _lineno_of("marker:second"),
+    ]
+    assert all(r.id == "UAV-17" for r in records)
+
+
+def test_hexdump_reports_caller():
+    log = logging.getLogger("test_call_sites.hexdump")
+    wrapper = add_id_to_log(log, "UAV-17")
+    traffic = TrafficLogger(wrapper, address="1.2.3.4")
+
+    def func():
+        log_hexdump(log, b"abc")  # marker:plain
+        log_hexdump(wrapper, b"abc")  # marker:wrapped
+        traffic.inbound(b"abc")  # marker:inbound
+        traffic.log(b"abc")  # marker:log
+
+    records = _log_with(log, func)
+
+    assert [r.pathname for r in records] == [__file__] * 4
+    assert [r.lineno for r in records] == [
+        _lineno_of("marker:plain"),
+        _lineno_of("marker:wrapped"),
+        _lineno_of("marker:inbound"),
+        _lineno_of("marker:log"),
+    ]
@@ -0,0 +1,49 @@
+import gzip
+import logging
+
+from flockwave.logger.sinks import CompressedFileHandler
+
+
+def _make_record(index):
+    return logging.LogRecord(
+        "test", logging.INFO, __file__, 1, "line %d", (index,), None
+    )
+
+
+def test_gzip_frames_and_index(tmp_path):
+    filename = tmp_path / "log.gz"
+    handler = CompressedFileHandler(filename, compression="gzip", frame_size=100)
+    for index in range(50):
+        handler.handle(_make_record(index))
+    handler.close()
+
+    data = filename.read_bytes()
+    lines = gzip.decompress(data).decode("utf-8").splitlines()
+    assert lines == [f"line {index}" for index in range(50)]
+
+    index_lines = (tmp_path / "log.gz.idx").read_text().splitlines()
+    assert len(index_lines) > 1
+    for entry in index_lines:
+        offset, length, _first, _last = entry.split("\t")
+        frame = data[int(offset) : int(offset) + int(length)]
+        assert gzip.decompress(frame)
+
+
+def test_close_with_handler_lock_held(tmp_path):
+    # logging.shutdown() flushes and closes handlers with their locks held
+    # while the worker thread may be submitting a batch after a timeout
+    for attempt in range(20):
+        filename = tmp_path / f"log{attempt}.gz"
+        handler = CompressedFileHandler(
+            filename, compression="gzip", flush_interval=0.0001, index=False
+        )
+        handler.handle(_make_record(attempt))
+
+        handler.acquire()
+        try:
+            handler.flush()
+            handler.close()
+        finally:
+            handler.release()
+
+        assert gzip.decompress(filename.read_bytes()) == f"line {attempt}\n".encode()
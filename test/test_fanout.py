@@ -0,0 +1,54 @@
+import io
+import json
+import logging
+
+import pytest
+
+from flockwave.logger import install
+from flockwave.logger.sinks import FanOutHandler
+from flockwave.logger.sinks import fanout
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    level = root.level
+    yield root
+    root.handlers = handlers
+    root.setLevel(level)
+
+
+def test_install_with_multiple_sinks(root_logger, monkeypatch):
+    calls = []
+
+    def prepare_record(record):
+        calls.append(record.getMessage())
+        original_prepare_record(record)
+
+    original_prepare_record = fanout.prepare_record
+    monkeypatch.setattr(fanout, "prepare_record", prepare_record)
+
+    plain, json_stream, warnings = io.StringIO(), io.StringIO(), io.StringIO()
+    warnings_handler = logging.StreamHandler(warnings)
+    warnings_handler.setLevel(logging.WARNING)
+
+    install(
+        level=logging.DEBUG,
+        sinks=[(plain, "plain"), (json_stream, "json"), (warnings_handler, "plain")],
+    )
+    assert isinstance(root_logger.handlers[-1], FanOutHandler)
+
+    log = logging.getLogger("test_fanout")
+    log.info("info %d", 1)
+    log.warning("warning %d", 2)
+
+    assert calls == ["info 1", "warning 2"]
+    assert plain.getvalue().splitlines() == [
+        "test_fanout:: info 1",
+        "test_fanout:: warning 2",
+    ]
+    assert [
+        json.loads(line)["message"] for line in json_stream.getvalue().splitlines()
+    ] == ["info 1", "warning 2"]
+    assert warnings.getvalue().splitlines() == ["test_fanout:: warning 2"]
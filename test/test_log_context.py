@@ -0,0 +1,89 @@
+import asyncio
+import logging
+
+from flockwave.logger import create_formatter, log_context
+from flockwave.logger.records import install_record_factory
+from flockwave.logger.sinks import AsyncioStreamAdapter, AsyncLogSink
+
+
+class FakeStreamWriter:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def test_async_sink_uses_context_of_caller():
+    log = logging.getLogger("test_log_context.async_sink")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+    writer = FakeStreamWriter()
+    sink = AsyncLogSink(AsyncioStreamAdapter(writer))
+    sink.setFormatter(create_formatter("plain"))
+    log.addHandler(sink)
+
+    async def worker(index):
+        with log_context(id=f"UAV-{index}"):
+            await asyncio.sleep(0.001 * (3 - index))
+            log.info("hello")
+
+    async def main():
+        task = asyncio.create_task(sink.run())
+        await asyncio.gather(*(worker(index) for index in range(3)))
+        await sink.aflush()
+        task.cancel()
+
+    try:
+        asyncio.run(main())
+    finally:
+        log.removeHandler(sink)
+
+    assert writer.data.decode("utf-8").splitlines() == [
+        "async_sink:UAV-2: hello",
+        "async_sink:UAV-1: hello",
+        "async_sink:UAV-0: hello",
+    ]
+
+
+def test_context_is_captured_when_the_record_is_created():
+    install_record_factory()
+    factory = logging.getLogRecordFactory()
+
+    with log_context(id="UAV-17"):
+        record = factory("test", logging.INFO, __file__, 1, "hello", None, None)
+
+    # Formatted outside the context
+    assert create_formatter("plain").format(record) == "test:UAV-17: hello"
+
+
+def test_explicit_extra_takes_precedence():
+    install_record_factory()
+    log = logging.getLogger("test_log_context.extra")
+
+    with log_context(id="UAV-17", semantics="success"):
+        record = log.makeRecord(
+            log.name, logging.INFO, __file__, 1, "hi", None, None, extra={"id": "x"}
+        )
+
+    assert create_formatter("plain").format(record) == "extra:x: hi"
+
+
+def test_nested_contexts():
+    with log_context(id="UAV-17"):
+        with log_context(semantics="success"):
+            install_record_factory()
+            record = logging.getLogRecordFactory()(
+                "test", logging.INFO, __file__, 1, "hi", None, None
+            )
+    assert record._log_context == {"id": "UAV-17", "semantics": "success"}
@@ -0,0 +1,61 @@
+import logging
+
+from flockwave.logger import add_id_to_log
+
+
+class RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _create_logger(name, level=logging.DEBUG):
+    log = logging.getLogger(name)
+    log.setLevel(level)
+    log.propagate = False
+    collector = RecordCollector()
+    log.handlers = [collector]
+    return log, collector.records
+
+
+def test_log_with_keyword_arguments():
+    log, records = _create_logger("test_extra_data.keywords")
+    wrapper = add_id_to_log(log, "UAV-17")
+
+    wrapper.log(level=logging.INFO, msg="keywords")
+    wrapper.log(logging.WARNING, msg="mixed")
+    wrapper.info(msg="info")
+
+    assert [(r.levelno, r.getMessage(), r.id) for r in records] == [
+        (logging.INFO, "keywords", "UAV-17"),
+        (logging.WARNING, "mixed", "UAV-17"),
+        (logging.INFO, "info", "UAV-17"),
+    ]
+
+
+def test_disabled_levels_are_skipped():
+    log, records = _create_logger("test_extra_data.levels", logging.WARNING)
+    wrapper = add_id_to_log(log, "UAV-17")
+
+    wrapper.info("skipped")
+    wrapper.log(logging.DEBUG, "skipped")
+    wrapper.log(level=logging.DEBUG, msg="skipped")
+    wrapper.error("kept")
+
+    assert [r.getMessage() for r in records] == ["kept"]
+
+
+def test_extra_of_caller_is_merged_but_not_modified():
+    log, records = _create_logger("test_extra_data.extra")
+    wrapper = add_id_to_log(log, "UAV-17")
+
+    extra = {"semantics": "success"}
+    wrapper.info("merged", extra=extra)
+    wrapper.info("override", extra={"id": "other"})
+
+    assert extra == {"semantics": "success"}
+    assert (records[0].id, records[0].semantics) == ("UAV-17", "success")
+    assert records[1].id == "other"
@@ -0,0 +1,134 @@
+import logging
+
+from flockwave.logger import create_handler
+from flockwave.logger.sinks import RecentLogBuffer
+
+
+def _make_record(index, id="", semantics=None, level=logging.INFO):
+    record = logging.LogRecord("test", level, __file__, 1, "msg %d", (index,), None)
+    record.created = 1000.0 + index
+    if id:
+        record.id = id
+    if semantics is not None:
+        record.semantics = semantics
+    return record
+
+
+def _fill(buffer, count, **kwds):
+    for index in range(count):
+        buffer.handle(_make_record(index, **kwds))
+
+
+def test_query_returns_entries_in_order():
+    buffer = RecentLogBuffer(capacity=10)
+    _fill(buffer, 3)
+
+    entries = buffer.query()
+    assert [entry.message for entry in entries] == ["msg 0", "msg 1", "msg 2"]
+    assert [entry.seq for entry in entries] == [0, 1, 2]
+    assert entries[0].created == 1000.0
+    assert len(buffer) == 3
+
+
+def test_ring_buffer_wraps_around():
+    buffer = RecentLogBuffer(capacity=4)
+    _fill(buffer, 10)
+
+    entries = buffer.query()
+    assert len(buffer) == 4
+    assert [entry.message for entry in entries] == [f"msg {i}" for i in range(6, 10)]
+    assert [entry.seq for entry in entries] == [6, 7, 8, 9]
+
+
+def test_query_since_until_and_limit():
+    buffer = RecentLogBuffer(capacity=100)
+    _fill(buffer, 20)
+
+    entries = buffer.query(since=1005, until=1010)
+    assert [entry.seq for entry in entries] == [5, 6, 7, 8, 9]
+
+    entries = buffer.query(since=1005, limit=3)
+    assert [entry.seq for entry in entries] == [17, 18, 19]
+
+    assert buffer.query(since=2000) == []
+
+
+def test_query_since_after_wrap_around():
+    buffer = RecentLogBuffer(capacity=5)
+    _fill(buffer, 12)
+
+    # Entries before 1007 have been overwritten already
+    assert [entry.seq for entry in buffer.query(since=1000)] == [7, 8, 9, 10, 11]
+    assert [entry.seq for entry in buffer.query(since=1010)] == [10, 11]
+
+
+def test_query_by_id_level_and_semantics():
+    buffer = RecentLogBuffer(capacity=100)
+    buffer.handle(_make_record(0, id="UAV-1"))
+    buffer.handle(_make_record(1, id="UAV-2", semantics="inbound"))
+    buffer.handle(_make_record(2, id="UAV-1", level=logging.ERROR))
+    buffer.handle(_make_record(3, semantics="inbound", level=logging.DEBUG))
+
+    assert [e.seq for e in buffer.query(id="UAV-1")] == [0, 2]
+    assert [e.seq for e in buffer.query(id="")] == [3]
+    assert [e.seq for e in buffer.query(level=logging.WARNING)] == [2]
+    assert [e.seq for e in buffer.query(semantics="inbound")] == [1, 3]
+    assert [e.seq for e in buffer.query(id="UAV-1", limit=1)] == [2]
+
+
+def test_clear():
+    buffer = RecentLogBuffer(capacity=4)
+    _fill(buffer, 6)
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.query() == []
+
+
+def test_subscribe_and_unsubscribe():
+    buffer = RecentLogBuffer(capacity=4)
+    received, inbound = [], []
+
+    unsubscribe = buffer.subscribe(received.append)
+    buffer.subscribe(inbound.append, semantics="inbound")
+
+    buffer.handle(_make_record(0))
+    buffer.handle(_make_record(1, semantics="inbound"))
+    unsubscribe()
+    buffer.handle(_make_record(2, semantics="inbound"))
+
+    assert [entry.seq for entry in received] == [0, 1]
+    assert [entry.seq for entry in inbound] == [1, 2]
+
+
+def test_failing_subscriber_does_not_break_logging():
+    buffer = RecentLogBuffer(capacity=4)
+
+    def fail(entry):
+        raise RuntimeError("subscriber failed")
+
+    buffer.subscribe(fail)
+    buffer.handle(_make_record(0))
+
+    assert [entry.seq for entry in buffer.query()] == [0]
+
+
+def test_query_since_with_out_of_order_timestamps():
+    buffer = RecentLogBuffer(capacity=10)
+    # Records logged from different threads may arrive out of order
+    for index in (0, 5, 3, 6, 4):
+        buffer.handle(_make_record(index))
+
+    entries = buffer.query(since=1005)
+    assert [entry.message for entry in entries] == ["msg 5", "msg 6"]
+
+    entries = buffer.query(since=1004)
+    assert [entry.message for entry in entries] == ["msg 5", "msg 6", "msg 4"]
+
+
+def test_style_of_sink_is_applied():
+    buffer = create_handler(RecentLogBuffer(capacity=10), "tabular")
+    buffer.handle(_make_record(1, id="UAV-17"))
+
+    message = buffer.query()[0].message
+    assert message.split("\t")[-2:] == ["UAV-17", "msg 1"]
@@ -0,0 +1,183 @@
+import io
+import json
+import logging
+import pickle
+import queue
+import threading
+
+from logging.handlers import QueueHandler, SocketHandler
+
+import pytest
+
+from flockwave.logger import install
+from flockwave.logger.formatters import (
+    create_json_formatter,
+    create_plain_formatter,
+    create_tabular_formatter,
+)
+from flockwave.logger.records import (
+    disable_unused_record_fields,
+    get_template_id,
+    install_record_factory,
+    LogRecord,
+    restore_record_fields,
+)
+
+
+def _get_loggers():
+    loggers = [logging.getLogger()]
+    loggers.extend(
+        logger
+        for logger in logging.Logger.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+    )
+    return loggers
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers = {logger: list(logger.handlers) for logger in _get_loggers()}
+    level = root.level
+    yield root
+    for logger in _get_loggers():
+        logger.handlers = handlers.get(logger, [])
+    root.setLevel(level)
+    restore_record_fields()
+
+
+def test_disable_and_restore_record_fields():
+    srcfile = logging._srcfile
+    try:
+        disable_unused_record_fields([logging.Formatter("%(message)s")])
+        assert logging._srcfile is None
+        assert not logging.logThreads
+
+        # Calling it again with other formatters starts from the original
+        # settings
+        disable_unused_record_fields([logging.Formatter("%(lineno)d")])
+        assert logging._srcfile == srcfile
+    finally:
+        restore_record_fields()
+
+    assert logging._srcfile == srcfile
+    assert logging.logThreads
+
+
+def _detach_handlers():
+    # pytest attaches its own handlers to loggers while a test is running;
+    # their formatters would need all the fields of the log records
+    for logger in _get_loggers():
+        logger.handlers = []
+
+
+def test_non_lean_install_restores_record_fields(root_logger):
+    _detach_handlers()
+    srcfile = logging._srcfile
+
+    install(sinks=[(io.StringIO(), "plain")], lean_records=True)
+    assert logging._srcfile is None
+
+    install(sinks=[(io.StringIO(), "plain")])
+    assert logging._srcfile == srcfile
+    assert logging.logThreads
+
+
+def test_lean_install_keeps_fields_of_existing_handlers(root_logger):
+    _detach_handlers()
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(funcName)s:%(threadName)s"))
+    other = logging.getLogger("test_records.other")
+    other.addHandler(handler)
+
+    try:
+        install(sinks=[(io.StringIO(), "plain")], lean_records=True)
+        other.warning("hello")
+    finally:
+        other.removeHandler(handler)
+
+    assert stream.getvalue() == (
+        "test_lean_install_keeps_fields_of_existing_handlers:MainThread\n"
+    )
+
+
+def _make_record_with_unpicklable_args():
+    install_record_factory()
+    log = logging.getLogger("test_records.pickle")
+    record = log.makeRecord(
+        log.name, logging.INFO, __file__, 1, "lock: %s", (threading.Lock(),), None
+    )
+    record.getMessage()
+    return record
+
+
+def test_prepared_record_can_be_pickled():
+    record = _make_record_with_unpicklable_args()
+    prepared = QueueHandler(queue.Queue()).prepare(record)
+
+    restored = pickle.loads(pickle.dumps(prepared))
+    assert restored.getMessage().startswith("lock: <unlocked")
+    assert restored.args is None
+
+
+def test_socket_handler_can_pickle_record():
+    record = _make_record_with_unpicklable_args()
+    data = SocketHandler("localhost", 0).makePickle(record)
+
+    attrs = pickle.loads(data[4:])
+    assert attrs["msg"].startswith("lock: <unlocked")
+    assert "_message_cache" not in attrs
+
+
+class CountingArgument:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return f"called {self.calls} time(s)"
+
+
+def test_message_is_interpolated_once_for_all_handlers():
+    arg = CountingArgument()
+    record = LogRecord("test", logging.INFO, __file__, 1, "arg: %s", (arg,), None)
+    formatters = [
+        logging.Formatter("%(message)s"),
+        create_plain_formatter(),
+        create_tabular_formatter(),
+        create_json_formatter(),
+    ]
+
+    messages = [formatter.format(record) for formatter in formatters]
+    assert arg.calls == 1
+    assert all("arg: called 1 time(s)" in message for message in messages)
+
+    # Replacing the arguments invalidates the cached message
+    record.args = ("other",)
+    assert record.getMessage() == "arg: other"
+    assert arg.calls == 1
+
+
+def test_json_formatter_emits_template_only_when_asked():
+    record = LogRecord("test", logging.INFO, __file__, 1, "UAV %s at %d%%", None, None)
+    record.args = ("17", 42)
+
+    entry = json.loads(create_json_formatter().format(record))
+    assert entry["message"] == "UAV 17 at 42%"
+    assert not {"template_id", "template", "args"} & entry.keys()
+
+    entry = json.loads(create_json_formatter(show_template=True).format(record))
+    assert entry["template_id"] == get_template_id(record)
+    assert entry["template"] == "UAV %s at %d%%"
+    assert entry["args"] == ["17", 42]
+
+    record.args = ("18", 50)
+    other = json.loads(create_json_formatter(show_template=True).format(record))
+    assert other["template_id"] == entry["template_id"]
+    assert other["message"] == "UAV 18 at 50%"
+
+    record = LogRecord("test", logging.INFO, __file__, 1, "no arguments", None, None)
+    entry = json.loads(create_json_formatter(show_template=True).format(record))
+    assert "template_id" in entry
+    assert "template" not in entry
@@ -0,0 +1,82 @@
+import logging
+
+from flockwave.logger.sinks import RoutingHandler
+
+
+class RecordCollector(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _make_record(name, message, semantics=None, level=logging.INFO):
+    record = logging.LogRecord(name, level, __file__, 1, message, None, None)
+    if semantics is not None:
+        record.semantics = semantics
+    return record
+
+
+def test_first_matching_route_wins():
+    default, traffic, mavlink = RecordCollector(), RecordCollector(), RecordCollector()
+    handler = RoutingHandler([default])
+    handler.add_route([traffic], semantics=("inbound", "outbound"))
+    handler.add_route([mavlink], logger="app.mavlink")
+
+    handler.handle(_make_record("app.mavlink", "packet", semantics="inbound"))
+    handler.handle(_make_record("app.mavlink.network", "status"))
+    handler.handle(_make_record("app.mavlinkx", "not a child"))
+    handler.handle(_make_record("app", "other", semantics="success"))
+
+    assert traffic.messages == ["packet"]
+    assert mavlink.messages == ["status"]
+    assert default.messages == ["not a child", "other"]
+
+
+def test_semantics_as_single_string():
+    default, traffic = RecordCollector(), RecordCollector()
+    handler = RoutingHandler([default])
+    handler.add_route([traffic], semantics="inbound")
+
+    handler.handle(_make_record("app", "packet", semantics="inbound"))
+    handler.handle(_make_record("app", "i", semantics="i"))
+
+    assert traffic.messages == ["packet"]
+    assert default.messages == ["i"]
+
+
+def test_route_for_records_without_semantics():
+    default, plain = RecordCollector(), RecordCollector()
+    handler = RoutingHandler([default])
+    handler.add_route([plain], semantics=[None])
+
+    handler.handle(_make_record("app", "plain"))
+    handler.handle(_make_record("app", "success", semantics="success"))
+
+    assert plain.messages == ["plain"]
+    assert default.messages == ["success"]
+
+
+def test_adding_route_resets_dispatch_table():
+    default, traffic = RecordCollector(), RecordCollector()
+    handler = RoutingHandler([default])
+
+    handler.handle(_make_record("app", "first", semantics="inbound"))
+    handler.add_route([traffic], semantics="inbound")
+    handler.handle(_make_record("app", "second", semantics="inbound"))
+
+    assert default.messages == ["first"]
+    assert traffic.messages == ["second"]
+
+
+def test_levels_of_target_handlers_are_respected():
+    debug, warning = RecordCollector(), RecordCollector(logging.WARNING)
+    handler = RoutingHandler([debug, warning])
+
+    handler.handle(_make_record("app", "info"))
+    handler.handle(_make_record("app", "error", level=logging.ERROR))
+
+    assert debug.messages == ["info", "error"]
+    assert warning.messages == ["error"]
@@ -0,0 +1,59 @@
+import logging
+import pickle
+
+import pytest
+
+from flockwave.logger import FormatterConfig, get_style_config
+from flockwave.logger.formatters import styles
+
+
+def _make_record(message):
+    record = logging.LogRecord(
+        "test.styles", logging.INFO, __file__, 1, message, None, None
+    )
+    record.id = "UAV-17"
+    return record
+
+
+def test_styles_accept_options():
+    record = _make_record("hello")
+
+    assert "UAV-17" in styles["fancy"]().format(record)
+    assert "UAV-17" not in styles["fancy"](show_id=False).format(record)
+    assert "UAV-17" in styles["colorful"](show_id=True).format(record)
+
+    with_timestamp = styles["tabular"]().format(record)
+    without_timestamp = styles["tabular"](show_timestamp=False).format(record)
+    assert len(without_timestamp) < len(with_timestamp)
+
+
+def test_get_style_config_returns_cached_object():
+    assert get_style_config("fancy") is get_style_config("fancy")
+    assert get_style_config("tabular", show_timestamp=False) is get_style_config(
+        "tabular", show_timestamp=False
+    )
+    assert get_style_config("tabular") is not get_style_config(
+        "tabular", show_timestamp=False
+    )
+
+    with pytest.raises(ValueError):
+        get_style_config("no-such-style")
+
+
+@pytest.mark.parametrize("style", sorted(styles))
+def test_style_configs_survive_round_trips(style):
+    config = get_style_config(style)
+    record = _make_record("hello %s")
+    record.args = ("world",)
+    record.created = 1700000000.0
+    record.semantics = "success"
+    expected = config.create_formatter().format(logging.makeLogRecord(record.__dict__))
+
+    from_dict = FormatterConfig.from_dict(config.to_dict())
+    from_pickle = pickle.loads(pickle.dumps(config))
+    assert from_dict == config
+    assert from_pickle == config
+
+    for copy in (from_dict, from_pickle):
+        formatter = copy.create_formatter()
+        assert formatter.format(logging.makeLogRecord(record.__dict__)) == expected
@@ -0,0 +1,191 @@
+import io
+import logging
+import logging.handlers
+import random
+
+import pytest
+
+from flockwave.logger import create_handler, get_style_config
+from flockwave.logger.sinks import minimize_escape_codes, TerminalHandler
+from flockwave.logger.sinks.terminal import _SGR_SEQUENCE
+
+_SAMPLE_CODES = [
+    "\x1b[0m",
+    "\x1b[m",
+    "\x1b[1m",
+    "\x1b[2m",
+    "\x1b[22m",
+    "\x1b[3m",
+    "\x1b[4m",
+    "\x1b[24m",
+    "\x1b[7m",
+    "\x1b[31m",
+    "\x1b[32m",
+    "\x1b[39m",
+    "\x1b[90m",
+    "\x1b[41m",
+    "\x1b[49m",
+    "\x1b[1;31m",
+    "\x1b[2;37m",
+    "\x1b[0;36m",
+]
+_SAMPLE_TEXTS = ["a", "hello", " ", "   ", "\n", " x ", "\t"]
+
+
+_ATTRIBUTES = {1: "intensity", 2: "intensity", 3: 3, 4: 4, 7: 7}
+_ATTRIBUTE_RESETS = {22: "intensity", 23: 3, 24: 4, 27: 7, 39: "fg", 49: "bg"}
+
+
+def _apply(state, sequence):
+    for param in sequence[2:-1].split(";"):
+        code = int(param) if param else 0
+        if code == 0:
+            state.clear()
+        elif code in _ATTRIBUTES:
+            state[_ATTRIBUTES[code]] = code
+        elif code in _ATTRIBUTE_RESETS:
+            state.pop(_ATTRIBUTE_RESETS[code], None)
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            state["fg"] = code
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            state["bg"] = code
+        else:
+            raise ValueError(sequence)
+
+
+def _render(text):
+    """Returns what the terminal shows for the given text: each character
+    with the attributes that are visible on it, and the final attributes.
+    """
+    state = {}
+    cells = []
+    for piece in _SGR_SEQUENCE.split(text):
+        if _SGR_SEQUENCE.fullmatch(piece):
+            _apply(state, piece)
+            continue
+        for char in piece:
+            if char.isspace():
+                visible = {k: v for k, v in state.items() if k in ("bg", 4, 7)}
+            else:
+                visible = dict(state)
+            cells.append((char, sorted(visible.items(), key=str)))
+    return cells, sorted(state.items(), key=str)
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("plain", "plain"),
+        ("\x1b[0mhello", "hello"),
+        ("\x1b[31mred\x1b[31m still red\x1b[0m", "\x1b[31mred still red\x1b[0m"),
+        ("\x1b[0m\x1b[0mx", "x"),
+        ("\x1b[36m   \x1b[0m\x1b[32mok", "   \x1b[32mok"),
+        ("\x1b[41m  \x1b[0m", "\x1b[41m  \x1b[0m"),
+        ("x\x1b[31m", "x\x1b[31m"),
+    ],
+)
+def test_minimize_escape_codes_examples(text, expected):
+    assert minimize_escape_codes(text) == expected
+    assert _render(minimize_escape_codes(text)) == _render(text)
+
+
+def test_minimize_escape_codes_keeps_appearance_of_random_texts():
+    rng = random.Random(42)
+    for _ in range(2000):
+        pieces = [
+            rng.choice(_SAMPLE_CODES)
+            if rng.random() < 0.5
+            else rng.choice(_SAMPLE_TEXTS)
+            for _ in range(rng.randint(1, 12))
+        ]
+        text = "".join(pieces)
+        minimized = minimize_escape_codes(text)
+        assert len(minimized) <= len(text)
+        assert _render(minimized) == _render(text), repr(text)
+
+
+def test_minimize_escape_codes_keeps_appearance_of_fancy_output():
+    formatter = get_style_config("fancy").create_formatter()
+    for semantics in (None, "inbound", "success", "failure"):
+        record = logging.LogRecord("app.uav", logging.INFO, "", 1, "hi", None, None)
+        if semantics:
+            record.semantics = semantics
+        text = formatter.format(record)
+        assert _render(minimize_escape_codes(text)) == _render(text)
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def _get_formatter_kind(handler):
+    return type(handler.formatter).__name__
+
+
+def test_create_handler_falls_back_to_plain_without_terminal(monkeypatch):
+    monkeypatch.delenv("FORCE_COLOR", raising=False)
+    monkeypatch.delenv("NO_COLOR", raising=False)
+
+    handler = create_handler(io.StringIO(), "fancy")
+    assert type(handler) is logging.StreamHandler
+    assert _get_formatter_kind(handler) == "PlainFormatter"
+
+    handler = create_handler(io.StringIO(), get_style_config("fancy"))
+    assert _get_formatter_kind(handler) == "PlainFormatter"
+
+    handler = create_handler(FakeTerminal(), "fancy")
+    try:
+        assert isinstance(handler, TerminalHandler)
+        assert _get_formatter_kind(handler) == "ColoredFormatter"
+    finally:
+        handler.close()
+
+
+def test_create_handler_force_color(monkeypatch):
+    monkeypatch.delenv("FORCE_COLOR", raising=False)
+    monkeypatch.setenv("NO_COLOR", "1")
+
+    handler = create_handler(io.StringIO(), "fancy", force_color=True)
+    assert type(handler) is logging.StreamHandler
+    assert _get_formatter_kind(handler) == "ColoredFormatter"
+
+    handler = create_handler(FakeTerminal(), "colorful")
+    assert _get_formatter_kind(handler) == "PlainFormatter"
+
+    monkeypatch.delenv("NO_COLOR")
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    handler = create_handler(io.StringIO(), get_style_config("symbolic"))
+    assert _get_formatter_kind(handler) == "ColoredFormatter"
+
+    handler = create_handler(io.StringIO(), "fancy", force_color=False)
+    assert _get_formatter_kind(handler) == "PlainFormatter"
+
+
+def test_create_handler_falls_back_to_plain_for_files(monkeypatch, tmp_path):
+    monkeypatch.delenv("NO_COLOR", raising=False)
+    monkeypatch.setenv("FORCE_COLOR", "1")
+
+    handler = create_handler(tmp_path / "app.log", "fancy")
+    try:
+        assert _get_formatter_kind(handler) == "PlainFormatter"
+    finally:
+        handler.close()
+
+    handler = create_handler(logging.FileHandler(tmp_path / "other.log"), "symbolic")
+    try:
+        assert _get_formatter_kind(handler) == "PlainFormatter"
+    finally:
+        handler.close()
+
+    handler = create_handler(logging.handlers.BufferingHandler(10), "colorful")
+    assert _get_formatter_kind(handler) == "PlainFormatter"
+
+    handler = create_handler(logging.StreamHandler(FakeTerminal()), "fancy")
+    assert _get_formatter_kind(handler) == "ColoredFormatter"
+
+    handler = create_handler(tmp_path / "colored.log", "fancy", force_color=True)
+    try:
+        assert _get_formatter_kind(handler) == "ColoredFormatter"
+    finally:
+        handler.close()
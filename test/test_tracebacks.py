@@ -0,0 +1,100 @@
+import sys
+
+from flockwave.logger.tracebacks import TracebackCache
+
+
+def _raise(exc):
+    raise exc
+
+
+def _capture(exc):
+    try:
+        _raise(exc)
+    except BaseException:
+        return sys.exc_info()
+
+
+def _capture_many(count, message="bad"):
+    # All the exceptions are raised from the same code location
+    return [_capture(ValueError(message)) for _ in range(count)]
+
+
+def test_same_exception_from_same_location_is_reused():
+    cache = TracebackCache()
+    first, second = _capture_many(2)
+
+    text = cache.format(first)
+    assert text.startswith("Traceback (most recent call last):")
+    assert text.endswith("ValueError: bad")
+    assert cache.format(second) is text
+
+
+def test_key_includes_message_and_location():
+    cache = TracebackCache()
+    (bad,) = _capture_many(1, "bad")
+    (worse,) = _capture_many(1, "worse")
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        other_location = sys.exc_info()
+
+    assert cache.format(bad) != cache.format(worse)
+    assert cache.format(other_location) != cache.format(bad)
+
+
+def test_chained_exceptions_are_keyed_by_the_whole_chain():
+    cache = TracebackCache()
+
+    def chained(cause_message):
+        try:
+            try:
+                raise KeyError(cause_message)
+            except KeyError as ex:
+                raise ValueError("bad") from ex
+        except ValueError:
+            return sys.exc_info()
+
+    foo, bar = chained("foo"), chained("bar")
+    assert "KeyError: 'foo'" in cache.format(foo)
+    assert "KeyError: 'bar'" in cache.format(bar)
+
+
+def test_collapse_repeats():
+    cache = TracebackCache(collapse_repeats=True)
+    first, second, third = _capture_many(3)
+    (other,) = _capture_many(1, "other")
+
+    text = cache.format(first)
+    assert text.startswith("Traceback #1 (most recent call last):")
+    assert cache.format(second) == "Traceback #1 repeated: ValueError: bad"
+    assert cache.format(other).startswith("Traceback #2 (most recent call last):")
+    assert cache.format(third) == "Traceback #1 repeated: ValueError: bad"
+
+
+def test_collapsed_multiline_message_keeps_exception_type():
+    cache = TracebackCache(collapse_repeats=True)
+    first, second = _capture_many(2, "bad\nthing")
+
+    cache.format(first)
+    assert cache.format(second) == "Traceback #1 repeated: ValueError: bad"
+
+
+def test_collapsed_traceback_is_shown_again_after_interval():
+    cache = TracebackCache(collapse_repeats=True, collapse_interval=0)
+    first, second = _capture_many(2)
+
+    text = cache.format(first)
+    assert cache.format(second) == text
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TracebackCache(maxsize=2, collapse_repeats=True)
+    a, b, c = (_capture_many(2, message) for message in "abc")
+
+    cache.format(a[0])
+    cache.format(b[0])
+    cache.format(a[1])  # a is now the most recently used one
+    cache.format(c[0])  # evicts b
+
+    assert cache.format(b[1]).startswith("Traceback #4 (most recent call last):")
+    assert cache.format(c[1]) == "Traceback #3 repeated: ValueError: c"
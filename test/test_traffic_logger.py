@@ -0,0 +1,88 @@
+import logging
+
+from flockwave.logger import log_hexdump, TrafficLogger
+from flockwave.logger.utils import (
+    _create_extra_args_for_logging_traffic_cached,
+    create_extra_args_for_logging_traffic,
+)
+
+
+class Address:
+    """Hashable address that counts how many times it was converted to a
+    string with ``repr()``.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.repr_calls = 0
+
+    def __hash__(self):
+        return hash((self.host, self.port))
+
+    def __eq__(self, other):
+        return (self.host, self.port) == (other.host, other.port)
+
+    def __repr__(self):
+        self.repr_calls += 1
+        return f"{self.host}:{self.port}"
+
+
+class RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _create_logger(name):
+    log = logging.getLogger(name)
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    collector = RecordCollector()
+    log.handlers = [collector]
+    return log, collector.records
+
+
+def test_traffic_logger_uses_cached_extras():
+    _create_extra_args_for_logging_traffic_cached.cache_clear()
+    log, records = _create_logger("test_traffic_logger.cached")
+
+    address = Address("192.168.1.17", 14550)
+    traffic = TrafficLogger(log, address)
+    for _ in range(3):
+        traffic.inbound(b"\x01\x02")
+        traffic.outbound(b"\x03")
+        traffic.log(b"\x04")
+        log_hexdump(log, b"\x05", address=address, direction="in")
+
+    # One repr() for each direction when the traffic logger is constructed,
+    # and none afterwards
+    assert address.repr_calls == 3
+
+    semantics = [getattr(record, "semantics", None) for record in records[:4]]
+    assert semantics == ["inbound", "outbound", None, "inbound"]
+    assert {record.id for record in records} == {"1.17:14550"}
+
+
+def test_unhashable_addresses_are_not_cached():
+    log, records = _create_logger("test_traffic_logger.unhashable")
+
+    traffic = TrafficLogger(log, ["10.0.0.1", 5760])
+    traffic.inbound(b"\x01")
+
+    assert records[0].id == repr(["10.0.0.1", 5760])[-10:]
+    assert records[0].semantics == "inbound"
+
+
+def test_extra_dict_of_caller_is_not_shared_with_cache():
+    extra = create_extra_args_for_logging_traffic("192.168.1.17", "out")
+    extra["semantics"] = "modified"
+    extra["other"] = 42
+
+    assert create_extra_args_for_logging_traffic("192.168.1.17", "out") == {
+        "id": "2.168.1.17",
+        "semantics": "outbound",
+    }